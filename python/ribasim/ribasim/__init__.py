@@ -2,8 +2,21 @@ __version__ = "2025.1.0"
 # Keep synced write_schema_version in ribasim_qgis/core/geopackage.py
 __schema_version__ = 4
 
+from ribasim.cache import ReadCache
 from ribasim.config import Allocation, Logging, Node, Solver
 from ribasim.geometry.link import LinkTable
+from ribasim.migrations import migrate
 from ribasim.model import Model
+from ribasim.report import ValidationReport
 
-__all__ = ["LinkTable", "Allocation", "Logging", "Model", "Solver", "Node"]
+__all__ = [
+    "LinkTable",
+    "Allocation",
+    "Logging",
+    "Model",
+    "ReadCache",
+    "migrate",
+    "Solver",
+    "Node",
+    "ValidationReport",
+]
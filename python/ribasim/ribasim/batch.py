@@ -0,0 +1,147 @@
+"""Migrate or validate many models at once, each in its own process.
+
+python -m ribasim.batch migrate models/
+python -m ribasim.batch validate models/ --processes 4 --summary summary.csv
+"""
+
+import argparse
+import sys
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import tomli
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+from ribasim.migrations import migrate
+from ribasim.model import Model
+
+TASKS = ("migrate", "validate")
+
+
+def _find_models(directories: Iterable[Path]) -> list[Path]:
+    """Find the TOML files of the models in the directories, by their database."""
+    models = []
+    for directory in directories:
+        for path in sorted(Path(directory).rglob("*.toml")):
+            try:
+                with open(path, "rb") as f:
+                    input_dir = tomli.load(f).get("input_dir", ".")
+            except (OSError, tomli.TOMLDecodeError):
+                continue
+            if (path.parent / input_dir / "database.gpkg").is_file():
+                models.append(path)
+    return models
+
+
+def _peak_memory() -> float | None:
+    """Return the peak memory of this process in MiB, if known."""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and in KiB elsewhere
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+def _process(task: str, toml_path: Path) -> dict[str, Any]:
+    """Run the task on a single model, in a fresh worker process."""
+    start = time.perf_counter()
+    try:
+        status, message = "ok", ""
+        if task == "migrate":
+            migrate(toml_path)
+        else:
+            report = Model.read(toml_path).validation_report()
+            if not report.is_valid:
+                status = "invalid"
+                message = f"{len(report.df)} problem(s): " + "; ".join(
+                    report.df["message"].head(5)
+                )
+    except Exception as e:
+        status, message = "failed", f"{type(e).__name__}: {e}"
+    return {
+        "model": str(toml_path),
+        "status": status,
+        "seconds": time.perf_counter() - start,
+        "peak_memory_mib": _peak_memory(),
+        "message": message,
+    }
+
+
+def run(
+    task: str, directories: Iterable[Path], processes: int | None = None
+) -> pd.DataFrame:
+    """Run the task on all models in the directories, and summarize the results.
+
+    Parameters
+    ----------
+    task : str
+        Either "migrate", see `ribasim.migrate`, or "validate", which reads the
+        models and reports the problems found by `Model.validation_report`.
+    directories : Iterable[Path]
+        The directories to search for models.
+    processes : int | None
+        The number of models to process at once (Optional, defaults to the number of CPUs).
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task '{task}', expected one of {TASKS}.")
+    models = _find_models(directories)
+    results = []
+    # Each worker handles a single model, such that its peak memory is that of the model
+    with ProcessPoolExecutor(max_workers=processes, max_tasks_per_child=1) as pool:
+        futures = [pool.submit(_process, task, model) for model in models]
+        for future in as_completed(futures):
+            result = future.result()
+            print(
+                f"{result['status']:<7} {result['seconds']:8.2f}s  {result['model']}",
+                flush=True,
+            )
+            results.append(result)
+    columns = ["model", "status", "seconds", "peak_memory_mib", "message"]
+    return pd.DataFrame(results, columns=columns).sort_values(
+        "model", ignore_index=True
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m ribasim.batch",
+        description="Migrate or validate all Ribasim models in the given directories.",
+    )
+    parser.add_argument("task", choices=TASKS, help="What to do with each model.")
+    parser.add_argument(
+        "directories",
+        type=Path,
+        nargs="+",
+        help="The directories to search for models.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="The number of models to process at once, defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--summary", type=Path, default=None, help="Write the summary to this CSV file."
+    )
+    args = parser.parse_args(argv)
+
+    summary = run(args.task, args.directories, args.processes)
+    print(summary.drop(columns="message").to_string(index=False))
+    if args.summary is not None:
+        summary.to_csv(args.summary, index=False)
+    failed = summary["status"] != "ok"
+    for row in summary[failed].itertuples():
+        print(f"{row.model}: {row.message}", file=sys.stderr)
+    return int(failed.any())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable
+from hashlib import blake2b
+from os import PathLike
+from pathlib import Path
+from typing import Any
+
+import ribasim
+
+__all__ = ("ReadCache",)
+
+
+class ReadCache:
+    """An on-disk cache of the validated tables of models, see `Model.read`.
+
+    A cached model is read without parsing the GeoPackage and validating its tables.
+    Entries are keyed on the path, size and modification time of the database,
+    and on the Ribasim version, such that a changed database is read again.
+    The least recently used entries are removed once the cache exceeds `max_size`.
+    Tables stored in Arrow files are not cached.
+
+    Parameters
+    ----------
+    directory : str | PathLike[str]
+        The directory to store the cache in.
+    max_size : int
+        The maximum total size of the cache in bytes (Optional, defaults to 4 GiB).
+    """
+
+    def __init__(self, directory: str | PathLike[str], max_size: int = 4 * 2**30):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def _key(db_path: Path) -> str:
+        stat = db_path.stat()
+        key = "\n".join(
+            [
+                str(db_path.resolve()),
+                str(stat.st_size),
+                str(stat.st_mtime_ns),
+                ribasim.__version__,
+                str(ribasim.__schema_version__),
+            ]
+        )
+        return blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def _get(self, key: str) -> dict[str, Path] | None:
+        """Return the files of the cached tables by name, if the entry exists."""
+        entry = self.directory / key
+        try:
+            paths = {path.name: path for path in entry.iterdir()}
+            # Mark the entry as recently used
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        return paths
+
+    def _put(self, key: str, tables: Iterable[Any]) -> None:
+        """Add the tables of a model to the cache."""
+        entry = self.directory / key
+        if entry.is_dir():
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a hidden directory first, such that readers only see complete entries
+        temp = Path(tempfile.mkdtemp(prefix=".", dir=self.directory))
+        try:
+            for table in tables:
+                table._write_cache(temp)
+            try:
+                temp.rename(entry)
+            except OSError:
+                # Another process added the same entry first
+                pass
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries until the cache fits `max_size`."""
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                size = sum(path.stat().st_size for path in entry.iterdir())
+                entries.append((entry.stat().st_mtime_ns, size, entry))
+            except FileNotFoundError:
+                # Removed by another process
+                continue
+
+        total = 0
+        for _, size, entry in sorted(entries, key=lambda x: x[0], reverse=True):
+            total += size
+            if total > self.max_size:
+                shutil.rmtree(entry, ignore_errors=True)
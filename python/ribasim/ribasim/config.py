@@ -6,13 +6,20 @@ from typing import Any
 import numpy as np
 import pandas as pd
 import pydantic
+import shapely
 from geopandas import GeoDataFrame
 from pydantic import ConfigDict, Field, NonNegativeInt, model_validator
 from shapely.geometry import Point
 
 from ribasim.geometry import BasinAreaSchema, NodeTable
 from ribasim.geometry.link import NodeData
-from ribasim.input_base import ChildModel, NodeModel, SpatialTableModel, TableModel
+from ribasim.input_base import (
+    ChildModel,
+    NodeModel,
+    SpatialTableModel,
+    TableModel,
+    context_file_loading,
+)
 
 # These schemas are autogenerated
 from ribasim.schemas import (
@@ -215,6 +222,19 @@ class MultiNodeModel(NodeModel):
     node: NodeTable = Field(default_factory=NodeTable)
     _node_type: str
 
+    @model_validator(mode="before")
+    @classmethod
+    def _set_node_from_db(cls, value: Any) -> Any:
+        # On Model.read, take the nodes of this type from the Node layer that is read once.
+        if (
+            isinstance(value, dict)
+            and "node" not in value
+            and "database" in context_file_loading.get()
+        ):
+            df = NodeTable._from_db_by_type(cls.__name__)
+            value = {**value, "node": NodeTable(df=df)}
+        return value
+
     @model_validator(mode="after")
     def filter(self) -> "MultiNodeModel":
         self.node.filter(self.__class__.__name__)
@@ -252,31 +272,126 @@ class MultiNodeModel(NodeModel):
                 f"Node IDs have to be unique, but {node_id} already exists."
             )
 
+        rows = []
+        for table in tables:
+            assert table.df is not None
+            rows.append((table, table.df.assign(node_id=node_id)))
+        node_table = node.into_geodataframe(
+            node_type=self.__class__.__name__, node_id=node_id
+        )
+        self._append(rows, node_table)
+
+        self._parent._used_node_ids.add(node_id)
+        return self[node_id]
+
+    def add_many(
+        self,
+        nodes: GeoDataFrame,
+        tables: Sequence[TableModel[Any]] | None = None,
+    ) -> list[NodeData]:
+        """Add many nodes and the associated data to the model at once.
+
+        This is much faster than calling `add` for every node,
+        since every table is appended to and validated only once.
+
+        Parameters
+        ----------
+        nodes : GeoDataFrame
+            One row per node, with a Point geometry and optionally the columns
+            `name`, `subnetwork_id` and extra columns with a `meta_` prefix.
+            If the index is named `node_id` it is used as the node IDs,
+            otherwise new node IDs are generated for the rows in order.
+        tables : Sequence[TableModel[Any]] | None
+            Tables of which the `node_id` column refers to the (integer) index of `nodes`.
+
+        Raises
+        ------
+        ValueError
+            When a node ID already exists, or a table refers to a node not in `nodes`.
+        """
+        if tables is None:
+            tables = []
+
+        if self._parent is None:
+            raise ValueError(
+                f"You can only add to a {self._node_type} MultiNodeModel when attached to a Model."
+            )
+        if not nodes.index.is_unique:
+            raise ValueError("The index of the nodes has to be unique.")
+
+        geometry = nodes.geometry.to_numpy()
+        if shapely.is_empty(geometry).any() or shapely.is_missing(geometry).any():
+            raise ValueError("Node geometry must be a valid Point")
+
+        used_node_ids = self._parent._used_node_ids
+        if nodes.index.name == "node_id":
+            node_ids = nodes.index.to_numpy(dtype=np.int32)
+            existing = used_node_ids.node_ids.intersection(node_ids.tolist())
+            if existing:
+                raise ValueError(
+                    f"Node IDs have to be unique, but {sorted(existing)} already exist."
+                )
+        else:
+            node_ids = np.array(used_node_ids.new_ids(len(nodes)), dtype=np.int32)
+
+        rows = []
         for table in tables:
+            assert table.df is not None
+            position = nodes.index.get_indexer(table.df["node_id"].to_numpy())
+            if (position == -1).any():
+                missing = np.unique(table.df["node_id"].to_numpy()[position == -1])
+                raise ValueError(
+                    f"{table.tablename()} refers to nodes that are not added: {missing}"
+                )
+            rows.append((table, table.df.assign(node_id=node_ids[position])))
+
+        # Remove any Z coordinate, this will cause issues connecting 2D and 3D nodes
+        geometry = shapely.force_2d(geometry)
+        node_table = GeoDataFrame(
+            nodes.drop(columns=nodes.geometry.name),
+            geometry=geometry,
+            crs=nodes.crs,
+        )
+        node_table.index = pd.Index(node_ids, name="node_id")
+        node_table["node_type"] = self.__class__.__name__
+        self._append(rows, node_table)
+        used_node_ids.update(node_ids.tolist())
+        return [
+            NodeData(node_id=node_id, node_type=self.__class__.__name__, geometry=point)
+            for node_id, point in zip(node_ids.tolist(), geometry)
+        ]
+
+    def _append(
+        self,
+        rows: Sequence[tuple[TableModel[Any], pd.DataFrame]],
+        node_table: GeoDataFrame,
+    ) -> None:
+        """Append the rows to the tables of their type, and the nodes to the node table.
+
+        All tables are validated before changing anything, such that an error leaves
+        the model unchanged.
+        """
+        assert self._parent is not None
+        new_tables: dict[str, TableModel[Any]] = {}
+        for table, table_to_append in rows:
             member_name = _pascal_to_snake(table.__class__.__name__)
-            existing_member = getattr(self, member_name)
+            existing_member = new_tables.get(member_name, getattr(self, member_name))
             existing_table = (
                 existing_member.df if existing_member.df is not None else pd.DataFrame()
             )
-            assert table.df is not None
-            table_to_append = table.df.assign(node_id=node_id)
             if isinstance(table_to_append, GeoDataFrame):
                 table_to_append.set_crs(self._parent.crs, inplace=True)
             new_table = _concat([existing_table, table_to_append], ignore_index=True)
-            setattr(self, member_name, new_table)
+            new_tables[member_name] = type(existing_member)(df=new_table)
 
-        node_table = node.into_geodataframe(
-            node_type=self.__class__.__name__, node_id=node_id
-        )
         node_table.set_crs(self._parent.crs, inplace=True)
-        if self.node.df is None:
-            self.node.df = node_table
-        else:
-            df = _concat([self.node.df, node_table])
-            self.node.df = df
+        if self.node.df is not None:
+            node_table = _concat([self.node.df, node_table])
+        new_node = type(self.node)(df=node_table)
 
-        self._parent._used_node_ids.add(node_id)
-        return self[node_id]
+        for member_name, new_member in new_tables.items():
+            setattr(self, member_name, new_member)
+        self.node = new_node
 
     def __getitem__(self, index: int) -> NodeData:
         # Unlike TableModel, support only indexing single rows.
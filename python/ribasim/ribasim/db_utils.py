@@ -1,6 +1,15 @@
+import re
+from collections.abc import Iterable, Sequence
 from contextlib import closing
 from pathlib import Path
 from sqlite3 import Connection, connect
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import shapely
+from shapely.geometry.base import BaseGeometry
 
 
 def esc_id(identifier: str) -> str:
@@ -24,7 +33,388 @@ def _set_gpkg_attribute_table(connection: Connection, table: str) -> None:
     with closing(connection.cursor()) as cursor:
         sql = "INSERT OR REPLACE INTO gpkg_contents (table_name, data_type, identifier) VALUES (?, ?, ?)"
         cursor.execute(sql, (table, "attributes", table))
-    connection.commit()
+
+
+def _get_table_names(db_path: Path) -> set[str]:
+    """Get the names of all tables in a SQLite database."""
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall()
+    return {name for (name,) in rows}
+
+
+def _copy_table(connection: Connection, source: Path, table: str) -> None:
+    """Copy a table with its definition and indexes from another SQLite database."""
+    # Read from a separate connection rather than attaching the source,
+    # since a database cannot be detached within a transaction.
+    with closing(connect(source)) as source_connection:
+        definitions = source_connection.execute(
+            "SELECT sql FROM sqlite_master WHERE tbl_name=? AND type IN ('table', 'index') AND sql IS NOT NULL ORDER BY type DESC",
+            (table,),
+        ).fetchall()
+        # The table definition is first, followed by the indexes
+        connection.execute(f"DROP TABLE IF EXISTS {esc_id(table)}")
+        connection.execute(definitions[0][0])
+        rows = source_connection.execute(f"SELECT * FROM {esc_id(table)}")
+        placeholders = ", ".join("?" * len(rows.description))
+        connection.executemany(
+            f"INSERT INTO {esc_id(table)} VALUES ({placeholders})", rows
+        )
+        for (sql,) in definitions[1:]:
+            connection.execute(sql)
+        # Tables from older files may lack the indexes
+        _create_indexes(connection, table, [name for name, *_ in rows.description])
+
+
+def _create_indexes(connection: Connection, table: str, columns: list[str]) -> None:
+    """Index the columns that tables are commonly filtered on, if present."""
+    indexes = []
+    if "node_id" in columns:
+        # A (node_id, time) index also serves queries on node_id only
+        indexes.append(["node_id", "time"] if "time" in columns else ["node_id"])
+    if "subgrid_id" in columns:
+        indexes.append(["subgrid_id"])
+    for index in indexes:
+        name = esc_id(f"ix_{table}_{'_'.join(index)}")
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {esc_id(table)} ({', '.join(map(esc_id, index))})"
+        )
+
+
+def _drop_tables(connection: Connection, tables: Iterable[str]) -> None:
+    """Drop attribute tables, and remove them from the GeoPackage contents."""
+    for table in tables:
+        connection.execute(f"DROP TABLE IF EXISTS {esc_id(table)}")
+        connection.execute("DELETE FROM gpkg_contents WHERE table_name=?", (table,))
+
+
+def _get_gpkg_contents(db_path: Path) -> dict[str, str]:
+    """Get the data type of all tables in the GeoPackage contents."""
+    with closing(connect(db_path)) as connection:
+        rows = connection.execute(
+            "SELECT table_name, data_type FROM gpkg_contents"
+        ).fetchall()
+    return dict(rows)
+
+
+def _sqlite_type(dtype: pa.DataType) -> str:
+    if pa.types.is_integer(dtype) or pa.types.is_boolean(dtype):
+        return "INTEGER"
+    elif pa.types.is_floating(dtype):
+        return "REAL"
+    elif pa.types.is_timestamp(dtype):
+        return "TIMESTAMP"
+    else:
+        return "TEXT"
+
+
+def _format_timestamps(array: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Format timestamps like "2025-05-29 14:16:00", only adding fractional seconds if present."""
+    seconds = array.cast(pa.timestamp("s"), safe=False)
+    formatted = seconds.cast(pa.string())
+    fractional = pc.not_equal(array, seconds.cast(array.type))
+    if pc.any(fractional).as_py():
+        formatted = pc.if_else(fractional, array.cast(pa.string()), formatted)
+    return formatted
+
+
+def _parse_timestamps(
+    array: pa.ChunkedArray, type: pa.TimestampType
+) -> pa.ChunkedArray | pa.Array:
+    """
+    Parse timestamps like "2025-05-29 14:16:00", see `_format_timestamps`.
+
+    Arrow parses ISO 8601 text directly to the given type. Text it rejects,
+    such as digits beyond the unit or a UTC offset, is parsed by pandas instead.
+    """
+    try:
+        return array.cast(type)
+    except pa.ArrowInvalid:
+        return pa.array(pd.to_datetime(array.to_pandas(), format="ISO8601"))
+
+
+def _cast(data: pa.Table, schema: pa.Schema) -> pa.Table:
+    """
+    Cast the columns that are in the schema to their Arrow type.
+
+    Other columns, and columns that cannot be cast safely, are left as they are
+    for the schema validation to report.
+    """
+    for i, name in enumerate(data.column_names):
+        if name not in schema.names:
+            continue
+        column = data[i]
+        target = schema.field(name).type
+        if column.type == target:
+            continue
+        try:
+            if pa.types.is_timestamp(target) and pa.types.is_string(column.type):
+                column = _parse_timestamps(column, target)
+            column = column.cast(target)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+        data = data.set_column(i, name, column)
+    return data
+
+
+def _read_table(
+    connection: Connection, table: str, schema: pa.Schema, batch_size: int = 65_536
+) -> pa.Table:
+    """Read a SQLite table into an Arrow table."""
+    sql = f"SELECT * FROM {esc_id(table)}"
+    return _read_query(connection, sql, schema, batch_size=batch_size)
+
+
+def _read_query(
+    connection: Connection,
+    sql: str,
+    schema: pa.Schema,
+    parameters: Sequence[Any] = (),
+    batch_size: int = 65_536,
+) -> pa.Table:
+    """
+    Read the result of a SQLite query into an Arrow table.
+
+    The rows are fetched and converted to Arrow in batches,
+    such that the full result never exists as Python objects.
+    """
+    cursor = connection.execute(sql, parameters)
+    names = [name for name, *_ in cursor.description]
+    batches = []
+    while rows := cursor.fetchmany(batch_size):
+        # Gathering the columns one by one is faster than transposing with zip
+        columns = [pa.array([row[i] for row in rows]) for i in range(len(names))]
+        batch = pa.Table.from_arrays(columns, names=names)
+        batches.append(_cast(batch, schema))
+    if not batches:
+        empty = [pa.array([], type=pa.null()) for _ in names]
+        return _cast(pa.Table.from_arrays(empty, names=names), schema)
+    return pa.concat_tables(batches, promote_options="permissive")
+
+
+def _write_table(
+    connection: Connection, table: str, df: pd.DataFrame, batch_size: int = 65_536
+) -> None:
+    """
+    Write a DataFrame to a SQLite table, replacing the table if it exists.
+
+    The index is written as the "fid" primary key, followed by the columns.
+    The rows are inserted in batches, without committing.
+    """
+    _write_batches(connection, table, [_with_fid(df)], batch_size)
+
+
+def _with_fid(df: pd.DataFrame) -> pa.Table:
+    """Convert a DataFrame to Arrow, with the index as the leading "fid" column."""
+    data = pa.Table.from_pandas(df.rename_axis("fid"), preserve_index=True)
+    return data.select(["fid", *map(str, df.columns)])
+
+
+def _write_batches(
+    connection: Connection,
+    table: str,
+    chunks: Iterable[pa.Table],
+    batch_size: int = 65_536,
+    commit: bool = False,
+) -> None:
+    """
+    Write Arrow tables with a leading "fid" column to a SQLite table, replacing the table if it exists.
+
+    The columns are taken from the first chunk. Without `commit`, the caller is
+    responsible for committing. With `commit`, each batch is committed into a
+    separate table, which replaces the table once all chunks are written.
+    """
+    target = table
+    if commit:
+        table = f"{target}_partial"
+    # Also removes the partial table that an interrupted write may have left
+    connection.execute(f"DROP TABLE IF EXISTS {esc_id(table)}")
+    column_names: list[str] = []
+    try:
+        for chunk in chunks:
+            if not column_names:
+                column_names = chunk.column_names
+                columns = [
+                    f"{esc_id(field.name)} {_sqlite_type(field.type)}"
+                    for field in list(chunk.schema)[1:]
+                ]
+                connection.execute(
+                    f'CREATE TABLE {esc_id(table)} ("fid" INTEGER PRIMARY KEY AUTOINCREMENT, {", ".join(columns)})'
+                )
+                placeholders = ", ".join("?" * chunk.num_columns)
+                sql = f"INSERT INTO {esc_id(table)} VALUES ({placeholders})"
+            for i, field in enumerate(chunk.schema):
+                if pa.types.is_timestamp(field.type):
+                    chunk = chunk.set_column(
+                        i, field.name, _format_timestamps(chunk[i])
+                    )
+            for batch in chunk.to_batches(max_chunksize=batch_size):
+                connection.executemany(
+                    sql, zip(*(column.to_pylist() for column in batch))
+                )
+                if commit:
+                    connection.commit()
+    except BaseException:
+        if commit:
+            # Remove the batches committed so far, leaving the table as it was
+            connection.rollback()
+            connection.execute(f"DROP TABLE IF EXISTS {esc_id(table)}")
+            connection.commit()
+        raise
+
+    if commit:
+        connection.execute(f"DROP TABLE IF EXISTS {esc_id(target)}")
+        connection.execute(f"ALTER TABLE {esc_id(table)} RENAME TO {esc_id(target)}")
+    # Creating the indexes after inserting is faster than maintaining them
+    _create_indexes(connection, target, column_names)
+
+
+def _columns(connection: Connection, table: str) -> list[str]:
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({esc_id(table)})")]
+
+
+def _primary_key(connection: Connection, table: str) -> str:
+    rows = connection.execute(f"PRAGMA table_info({esc_id(table)})")
+    return next(name for _, name, _, _, _, pk in rows if pk)
+
+
+def _rename_db_column(
+    connection: Connection, table: str, from_colname: str, to_colname: str
+) -> None:
+    """Rename a column if present, replacing a column of the new name, see `migrations._rename_column`."""
+    if from_colname not in _columns(connection, table):
+        return
+    if to_colname in _columns(connection, table):
+        _drop_columns(connection, table, [to_colname])
+    connection.execute(
+        f"ALTER TABLE {esc_id(table)} RENAME COLUMN {esc_id(from_colname)} TO {esc_id(to_colname)}"
+    )
+
+
+def _drop_columns(connection: Connection, table: str, columns: Iterable[str]) -> None:
+    """Drop the columns that are present, together with their indexes."""
+    present = _columns(connection, table)
+    for column in columns:
+        if column not in present:
+            continue
+        for _, index, *_ in connection.execute(
+            f"PRAGMA index_list({esc_id(table)})"
+        ).fetchall():
+            indexed = {
+                name
+                for *_, name in connection.execute(
+                    f"PRAGMA index_info({esc_id(index)})"
+                )
+            }
+            if column in indexed:
+                connection.execute(f"DROP INDEX {esc_id(index)}")
+        connection.execute(f"ALTER TABLE {esc_id(table)} DROP COLUMN {esc_id(column)}")
+
+
+def _set_primary_key(connection: Connection, table: str, column: str) -> None:
+    """Use the values of a column as the primary key, which takes its name."""
+    if column not in _columns(connection, table):
+        return
+    pk = _primary_key(connection, table)
+    if pk != column:
+        (duplicates,) = connection.execute(
+            f"SELECT count({esc_id(column)}) - count(DISTINCT {esc_id(column)}) FROM {esc_id(table)}"
+        ).fetchone()
+        if duplicates:
+            raise ValueError(f"The {column} of {table} has to be unique.")
+        # Go through negative keys, such that they are unique after each row update
+        connection.execute(
+            f"UPDATE {esc_id(table)} SET {esc_id(pk)} = -{esc_id(pk)} - 1"
+        )
+        connection.execute(
+            f"UPDATE {esc_id(table)} SET {esc_id(pk)} = {esc_id(column)}"
+        )
+        _drop_columns(connection, table, [column])
+        _rename_db_column(connection, table, pk, column)
+
+
+def _rename_table(connection: Connection, source: str, target: str) -> None:
+    """Rename a table, including its GeoPackage metadata, spatial index and triggers."""
+    geometry_columns = (
+        connection.execute(
+            "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?",
+            (source,),
+        ).fetchall()
+        if exists(connection, "gpkg_geometry_columns")
+        else []
+    )
+    connection.execute(f"ALTER TABLE {esc_id(source)} RENAME TO {esc_id(target)}")
+    for (column,) in geometry_columns:
+        rtree = f"rtree_{source}_{column}"
+        if exists(connection, rtree):
+            connection.execute(
+                f"ALTER TABLE {esc_id(rtree)} RENAME TO {esc_id(f'rtree_{target}_{column}')}"
+            )
+
+    # GDAL names the triggers after the table, and refers to it in string literals
+    pattern = re.compile(rf"(?<![A-Za-z]){re.escape(source)}(?![a-z])")
+    triggers = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+        (target,),
+    ).fetchall()
+    for name, sql in triggers:
+        connection.execute(f"DROP TRIGGER {esc_id(name)}")
+        connection.execute(pattern.sub(target, sql))
+
+    for metadata in [
+        "gpkg_contents",
+        "gpkg_geometry_columns",
+        "gpkg_extensions",
+        "gpkg_ogr_contents",
+        "gpkg_data_columns",
+    ]:
+        if exists(connection, metadata):
+            connection.execute(
+                f"UPDATE {metadata} SET table_name = ? WHERE table_name = ?",
+                (target, source),
+            )
+    if exists(connection, "gpkg_contents"):
+        connection.execute(
+            "UPDATE gpkg_contents SET identifier = ? WHERE table_name = ? AND identifier = ?",
+            (target, target, source),
+        )
+    if exists(connection, "layer_styles"):
+        # The style of the old table refers to its old columns
+        connection.execute("DELETE FROM layer_styles WHERE f_table_name = ?", (source,))
+
+
+# The size of the envelope of a GeoPackage geometry, by the envelope flag
+ENVELOPE_SIZES = [0, 32, 48, 48, 64]
+
+
+def _gpkg_geometry(blob: bytes | None) -> BaseGeometry | None:
+    """Parse a GeoPackage geometry: a header with an optional envelope, followed by WKB."""
+    if blob is None:
+        return None
+    envelope = (blob[3] >> 1) & 0b111
+    return shapely.from_wkb(bytes(blob[8 + ENVELOPE_SIZES[envelope] :]))
+
+
+def _register_gpkg_functions(connection: Connection) -> None:
+    """Register the spatial SQL functions used by the triggers that GDAL adds to GeoPackages."""
+
+    def is_empty(blob: bytes | None) -> int | None:
+        geometry = _gpkg_geometry(blob)
+        return None if geometry is None else int(geometry.is_empty)
+
+    def bound(i: int):
+        def f(blob: bytes | None) -> float | None:
+            geometry = _gpkg_geometry(blob)
+            if geometry is None or geometry.is_empty:
+                return None
+            return geometry.bounds[i]
+
+        return f
+
+    connection.create_function("ST_IsEmpty", 1, is_empty, deterministic=True)
+    for i, name in enumerate(["ST_MinX", "ST_MinY", "ST_MaxX", "ST_MaxY"]):
+        connection.create_function(name, 1, bound(i), deterministic=True)
 
 
 CREATE_TABLE_SQL = """
@@ -54,12 +444,16 @@ def _get_db_schema_version(db_path: Path) -> int:
 
 def _set_db_schema_version(db_path: Path, version: int = 1) -> None:
     with closing(connect(db_path)) as connection:
-        if not exists(connection, "metadata"):
-            with closing(connection.cursor()) as cursor:
-                cursor.execute(CREATE_TABLE_SQL)
-                cursor.execute(
-                    "INSERT OR REPLACE INTO ribasim_metadata (key, value) VALUES ('schema_version', ?)",
-                    (version,),
-                )
-            _set_gpkg_attribute_table(connection, "ribasim_metadata")
-            connection.commit()
+        _write_db_schema_version(connection, version)
+        connection.commit()
+
+
+def _write_db_schema_version(connection: Connection, version: int = 1) -> None:
+    if not exists(connection, "metadata"):
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(CREATE_TABLE_SQL)
+            cursor.execute(
+                "INSERT OR REPLACE INTO ribasim_metadata (key, value) VALUES ('schema_version', ?)",
+                (version,),
+            )
+        _set_gpkg_attribute_table(connection, "ribasim_metadata")
@@ -1,14 +1,36 @@
+from functools import cache
 from typing import Any, get_type_hints
 
+import numpy as np
+import pandas as pd
 import pandera as pa
+import shapely
+from numpy.typing import NDArray
 from pandera.typing import Series
 from pandera.typing.geopandas import GeoSeries
+from shapely.geometry.base import GEOMETRY_TYPES
 
 from ribasim.schemas import _BaseSchema
 
 
+@cache
+def _geometry_type_ids(schema: type) -> NDArray[np.int_]:
+    """Return the shapely type ids that are instances of the geometry type of the schema."""
+    T = get_type_hints(schema)["geometry"].__args__[0]
+    return np.array(
+        [
+            type_id
+            for type_id, name in enumerate(GEOMETRY_TYPES)
+            if issubclass(getattr(shapely.geometry, name), T)
+        ],
+        dtype=np.int_,
+    )
+
+
 class _GeoBaseSchema(_BaseSchema):
     @pa.check("geometry")
     def is_correct_geometry_type(cls, geoseries: GeoSeries[Any]) -> Series[bool]:
-        T = get_type_hints(cls)["geometry"].__args__[0]
-        return geoseries.map(lambda geom: isinstance(geom, T))
+        type_ids = shapely.get_type_id(np.asarray(geoseries, dtype=object))
+        return pd.Series(
+            np.isin(type_ids, _geometry_type_ids(cls)), index=geoseries.index
+        )
@@ -1,3 +1,5 @@
+from collections import Counter
+from collections.abc import Sequence
 from pathlib import Path
 from typing import NamedTuple
 
@@ -15,7 +17,7 @@ from pydantic import NonNegativeInt, PrivateAttr, model_validator
 from shapely.geometry import LineString, MultiLineString, Point
 
 from ribasim.db_utils import _get_db_schema_version
-from ribasim.input_base import SpatialTableModel
+from ribasim.input_base import SpatialTableModel, _frame_key, _same_frame
 from ribasim.utils import UsedIDs, _concat
 from ribasim.validation import (
     can_connect,
@@ -43,6 +45,44 @@ class NodeData(NamedTuple):
     geometry: Point
 
 
+class _NeighborIndex:
+    """Neighbor counts and (from_node_id, to_node_id) pairs of the links in a LinkTable.
+
+    This makes validating a single new link independent of the size of the table.
+    The index describes the frame it was built from, see `describes`.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.set_frame(df)
+        link_type = df["link_type"].tolist()
+        from_node_id = df["from_node_id"].tolist()
+        to_node_id = df["to_node_id"].tolist()
+        self.in_neighbors = Counter(zip(to_node_id, link_type))
+        self.out_neighbors = Counter(zip(from_node_id, link_type))
+        self.pairs = set(zip(from_node_id, to_node_id))
+
+    columns = ("from_node_id", "to_node_id", "link_type")
+
+    def set_frame(self, df: pd.DataFrame) -> None:
+        """Mark the index as describing this frame."""
+        self.key = _frame_key(df, self.columns)
+
+    def describes(self, df: pd.DataFrame) -> bool:
+        """Whether the frame is unchanged since the index was built or last updated.
+
+        Only frames with Arrow backed columns can be identified, since NumPy
+        arrays can be changed in place, so the index is rebuilt for other frames.
+        """
+        return self.key is not None and _same_frame(
+            self.key, _frame_key(df, self.columns)
+        )
+
+    def add(self, from_node_id: int, to_node_id: int, link_type: str) -> None:
+        self.in_neighbors[(to_node_id, link_type)] += 1
+        self.out_neighbors[(from_node_id, link_type)] += 1
+        self.pairs.add((from_node_id, to_node_id))
+
+
 class LinkSchema(_GeoBaseSchema):
     link_id: Index[Int32] = pa.Field(default=0, ge=0, check_name=True)
     name: Series[str] = pa.Field(default="")
@@ -60,6 +100,7 @@ class LinkTable(SpatialTableModel[LinkSchema]):
     """Defines the connections between nodes."""
 
     _used_link_ids: UsedIDs = PrivateAttr(default_factory=UsedIDs)
+    _neighbor_index: _NeighborIndex | None = PrivateAttr(default=None)
 
     @model_validator(mode="after")
     def _update_used_ids(self) -> "LinkTable":
@@ -68,6 +109,13 @@ class LinkTable(SpatialTableModel[LinkSchema]):
             self._used_link_ids.max_node_id = self.df.index.max()
         return self
 
+    def _get_neighbor_index(self) -> _NeighborIndex:
+        assert self.df is not None
+        # Rebuild the index when the table was assigned to or changed in place.
+        if self._neighbor_index is None or not self._neighbor_index.describes(self.df):
+            self._neighbor_index = _NeighborIndex(self.df)
+        return self._neighbor_index
+
     @classmethod
     def _from_db(cls, path: Path, table: str) -> pd.DataFrame | None:
         schema_version = _get_db_schema_version(path)
@@ -119,6 +167,11 @@ class LinkTable(SpatialTableModel[LinkSchema]):
         )
         self._validate_link(to_node, from_node, link_type)
         assert self.df is not None
+        neighbor_index = self._get_neighbor_index()
+        if (from_node.node_id, to_node.node_id) in neighbor_index.pairs:
+            raise ValueError(
+                f"Links have to be unique, but link with from_node_id {from_node.node_id} to_node_id {to_node.node_id} already exists."
+            )
         if link_id is None:
             link_id = self._used_link_ids.new_id()
         elif link_id in self._used_link_ids:
@@ -140,23 +193,162 @@ class LinkTable(SpatialTableModel[LinkSchema]):
         )
 
         self.df = GeoDataFrame[LinkSchema](_concat([self.df, table_to_append]))
-        if self.df.duplicated(subset=["from_node_id", "to_node_id"]).any():
+        # Update the index for the new frame, instead of rebuilding it.
+        neighbor_index.add(from_node.node_id, to_node.node_id, link_type)
+        neighbor_index.set_frame(self.df)
+        self._used_link_ids.add(link_id)
+
+    def add_many(
+        self,
+        from_nodes: Sequence[NodeData],
+        to_nodes: Sequence[NodeData],
+        geometry: Sequence[LineString | MultiLineString] | None = None,
+        name: str | Sequence[str] = "",
+        link_id: Sequence[NonNegativeInt] | None = None,
+        **kwargs,
+    ):
+        """
+        Add many links between nodes at once.
+
+        This is much faster than calling `add` for every link,
+        since all checks are done at once and the table is appended to only once.
+
+        Parameters
+        ----------
+        from_nodes : Sequence[NodeData]
+            The upstream node of every link, e.g. as returned by `model.basin.add_many`
+        to_nodes : Sequence[NodeData]
+            The downstream node of every link.
+        geometry : Sequence[LineString | MultiLineString] | None
+            The geometry of every link. If not supplied, it creates straight lines between the nodes.
+        name : str | Sequence[str]
+            An optional name for the links.
+        link_id : Sequence[int] | None
+            Optional non-negative link IDs. If not supplied, they will be automatically generated.
+        **kwargs : Dict
+        """
+        assert self.df is not None
+        if len(from_nodes) != len(to_nodes):
+            raise ValueError("The number of from_nodes and to_nodes must be equal.")
+        n = len(from_nodes)
+        if n == 0:
+            return
+        from_node_id = np.array([node.node_id for node in from_nodes], dtype=np.int32)
+        to_node_id = np.array([node.node_id for node in to_nodes], dtype=np.int32)
+        from_node_type = np.array([node.node_type for node in from_nodes], dtype=object)
+        to_node_type = np.array([node.node_type for node in to_nodes], dtype=object)
+
+        for node_type_up, node_type_down in set(zip(from_node_type, to_node_type)):
+            if not can_connect(node_type_up, node_type_down):
+                raise ValueError(
+                    f"Node of type {node_type_down} cannot be downstream of node of type {node_type_up}. Possible downstream node: {node_type_connectivity[node_type_up]}."
+                )
+
+        link_type = np.where(
+            np.isin(from_node_type, list(SPATIALCONTROLNODETYPES)), "control", "flow"
+        )
+
+        if link_id is None:
+            link_ids = np.array(self._used_link_ids.new_ids(n), dtype=np.int32)
+        else:
+            link_ids = np.asarray(link_id, dtype=np.int32)
+            existing = self._used_link_ids.node_ids.intersection(link_ids.tolist())
+            if existing:
+                raise ValueError(
+                    f"Link IDs have to be unique, but {sorted(existing)} already exist."
+                )
+            if len(np.unique(link_ids)) != n:
+                raise ValueError("Link IDs have to be unique.")
+
+        links = pd.DataFrame(
+            {
+                "from_node_id": np.concatenate(
+                    [self.df["from_node_id"].to_numpy(), from_node_id]
+                ),
+                "to_node_id": np.concatenate(
+                    [self.df["to_node_id"].to_numpy(), to_node_id]
+                ),
+                "link_type": np.concatenate(
+                    [self.df["link_type"].to_numpy(dtype=object), link_type]
+                ),
+            }
+        )
+        duplicated = links.duplicated(subset=["from_node_id", "to_node_id"])
+        if duplicated.any():
+            first = links[duplicated].iloc[0]
             raise ValueError(
-                f"Links have to be unique, but link with from_node_id {from_node.node_id} to_node_id {to_node.node_id} already exists."
+                f"Links have to be unique, but link with from_node_id {first['from_node_id']} to_node_id {first['to_node_id']} already exists."
             )
-        self._used_link_ids.add(link_id)
+        self._validate_neighbor_amount(
+            links, link_type, from_node_id, from_node_type, to_node_id, to_node_type
+        )
+
+        if geometry is None:
+            points = shapely.get_coordinates(
+                [node.geometry for node in from_nodes]
+                + [node.geometry for node in to_nodes]
+            )
+            coordinates = np.stack((points[:n], points[n:]), axis=1)
+            geometry = shapely.linestrings(coordinates)
+
+        table_to_append = GeoDataFrame[LinkSchema](
+            data={
+                "from_node_id": from_node_id,
+                "to_node_id": to_node_id,
+                "link_type": link_type,
+                "name": name,
+                **kwargs,
+            },
+            geometry=geometry,
+            crs=self.df.crs,
+            index=pd.Index(link_ids, name="link_id"),
+        )
+
+        self.df = GeoDataFrame[LinkSchema](_concat([self.df, table_to_append]))
+        self._used_link_ids.update(link_ids.tolist())
+
+    @staticmethod
+    def _validate_neighbor_amount(
+        links: pd.DataFrame,
+        new_link_type: NDArray[np.str_],
+        from_node_id: NDArray[np.int32],
+        from_node_type: NDArray[np.object_],
+        to_node_id: NDArray[np.int32],
+        to_node_type: NDArray[np.object_],
+    ) -> None:
+        """Check the maximum neighbor amount of the nodes of the new links, given all links."""
+        for link_type, link_amount in (
+            ("flow", flow_link_neighbor_amount),
+            ("control", control_link_neighbor_amount),
+        ):
+            of_type = links["link_type"].to_numpy() == link_type
+            is_new = new_link_type == link_type
+            for direction, node_id, node_type, column, bound in (
+                ("in", to_node_id[is_new], to_node_type[is_new], "to_node_id", 1),
+                (
+                    "out",
+                    from_node_id[is_new],
+                    from_node_type[is_new],
+                    "from_node_id",
+                    3,
+                ),
+            ):
+                count = links.loc[of_type, column].value_counts()
+                neighbors = count.reindex(node_id, fill_value=0).to_numpy()
+                maximum = np.array(
+                    [link_amount[t][bound] for t in node_type], dtype=np.int64
+                )
+                exceeded = neighbors > maximum
+                if exceeded.any():
+                    i = np.flatnonzero(exceeded)[0]
+                    raise ValueError(
+                        f"Node {node_id[i]} can have at most {maximum[i]} {link_type} link {direction}neighbor(s) (got {neighbors[i]})"
+                    )
 
     def _validate_link(self, to_node: NodeData, from_node: NodeData, link_type: str):
-        assert self.df is not None
-        in_neighbor: int = self.df.loc[
-            (self.df["to_node_id"] == to_node.node_id)
-            & (self.df["link_type"] == link_type)
-        ].shape[0]
-
-        out_neighbor: int = self.df.loc[
-            (self.df["from_node_id"] == from_node.node_id)
-            & (self.df["link_type"] == link_type)
-        ].shape[0]
+        neighbor_index = self._get_neighbor_index()
+        in_neighbor: int = neighbor_index.in_neighbors[(to_node.node_id, link_type)]
+        out_neighbor: int = neighbor_index.out_neighbors[(from_node.node_id, link_type)]
         # validation on neighbor amount
         max_in_flow: int = flow_link_neighbor_amount[to_node.node_type][1]
         max_out_flow: int = flow_link_neighbor_amount[from_node.node_type][3]
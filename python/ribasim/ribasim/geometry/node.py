@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Any
 
 import geopandas as gpd
@@ -11,7 +12,7 @@ from pandera.typing import Index, Series
 from pandera.typing.geopandas import GeoSeries
 from shapely.geometry import Point
 
-from ribasim.input_base import SpatialTableModel
+from ribasim.input_base import SpatialTableModel, context_file_loading
 
 from .base import _GeoBaseSchema
 
@@ -35,6 +36,33 @@ class NodeSchema(_GeoBaseSchema):
 class NodeTable(SpatialTableModel[NodeSchema]):
     """The Ribasim nodes as Point geometries."""
 
+    @classmethod
+    def _load(cls, filepath: Path | None) -> dict[str, Any]:
+        # On Model.read, the Node layer is read only once and partitioned
+        # over the node types, see `_from_db_by_type`.
+        if filepath is None and "database" in context_file_loading.get():
+            return {}
+        return super()._load(filepath)
+
+    @classmethod
+    def _from_db_by_type(cls, node_type: str) -> gpd.GeoDataFrame | None:
+        """Return the rows of the Node layer with the given node type.
+
+        The Node layer is read once per `Model.read` and split by node type.
+        The partitions are kept in the loading context for the other node types.
+        """
+        context = context_file_loading.get()
+        if "node_by_type" not in context:
+            df = (
+                cls._from_cache(context["cache_entry"])
+                if "cache_entry" in context
+                else cls._from_db(context["database"], cls.tablename())
+            )
+            context["node_by_type"] = (
+                {} if df is None else dict(tuple(df.groupby("node_type", sort=False)))
+            )
+        return context["node_by_type"].get(node_type)
+
     def filter(self, nodetype: str):
         """Filter the node table based on the node type."""
         if self.df is not None:
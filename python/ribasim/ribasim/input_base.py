@@ -1,13 +1,20 @@
 import re
+import shutil
+import weakref
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Generator
+from collections.abc import Callable, Generator, Iterable, Sequence
 from contextlib import closing
 from contextvars import ContextVar
+from functools import cache, partial
+from itertools import count
+from os import PathLike
 from pathlib import Path
-from sqlite3 import connect
+from sqlite3 import Connection, connect
 from typing import (
+    TYPE_CHECKING,
     Any,
     Generic,
+    Literal,
     TypeVar,
     cast,
 )
@@ -15,8 +22,12 @@ from typing import (
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 from pandera.typing import DataFrame
 from pandera.typing.geopandas import GeoDataFrame
+from pyarrow import feather
 from pydantic import BaseModel as PydanticBaseModel
 from pydantic import (
     ConfigDict,
@@ -24,6 +35,7 @@ from pydantic import (
     Field,
     PrivateAttr,
     ValidationInfo,
+    ValidatorFunctionWrapHandler,
     field_validator,
     model_serializer,
     model_validator,
@@ -32,14 +44,20 @@ from pydantic import (
 
 import ribasim
 from ribasim.db_utils import (
-    _get_db_schema_version,
+    _cast,
+    _copy_table,
+    _format_timestamps,
+    _read_query,
+    _read_table,
     _set_gpkg_attribute_table,
+    _with_fid,
+    _write_batches,
+    _write_table,
     esc_id,
     exists,
 )
 from ribasim.schemas import _BaseSchema
-
-from .styles import _add_styles_to_geopackage
+from ribasim.utils import _fingerprint
 
 __all__ = ("TableModel",)
 
@@ -67,6 +85,14 @@ context_file_loading: ContextVar[dict[str, Any]] = ContextVar(
 context_file_writing: ContextVar[dict[str, Any]] = ContextVar(
     "file_writing", default={}
 )
+# Every TableModel gets a new version on creation and on each assignment of `df`
+table_versions = count()
+# The schema metadata key of the compression of written Arrow files
+COMPRESSION_KEY = b"ribasim_compression"
+# Tables of which the validation is deferred, see `Model.batch_edit`
+context_batch_edit: ContextVar[dict[int, "TableModel[Any]"] | None] = ContextVar(
+    "batch_edit", default=None
+)
 
 TableT = TypeVar("TableT", bound=_BaseSchema)
 
@@ -74,6 +100,39 @@ TableT = TypeVar("TableT", bound=_BaseSchema)
 TABLES = ["profile", "state", "static", "time", "logic", "condition"]
 
 
+def _frame_key(df: pd.DataFrame, columns: Iterable[str]) -> tuple[Any, ...] | None:
+    """Identify the data of the columns and the index of a frame.
+
+    Arrow arrays are immutable, and pandas replaces them on every change.
+    Only frames of which all columns are Arrow backed can be identified.
+    """
+    arrays = []
+    for column in columns:
+        if column not in df.columns:
+            return None
+        array = df[column].array
+        if not isinstance(array, pd.arrays.ArrowExtensionArray):
+            return None
+        arrays.append(weakref.ref(array.__arrow_array__()))
+    return (weakref.ref(df.index), df.index.name, tuple(df.columns), tuple(arrays))
+
+
+def _same_frame(key: tuple[Any, ...], other: tuple[Any, ...] | None) -> bool:
+    """Whether two keys of `_frame_key` identify the same data."""
+    if other is None:
+        return False
+    index, name, columns, arrays = key
+    other_index, other_name, other_columns, other_arrays = other
+    # Compare the referenced objects, which are alive if the frame still refers to them
+    return (
+        index() is other_index()
+        and index() is not None
+        and name == other_name
+        and columns == other_columns
+        and all(a() is b() for a, b in zip(arrays, other_arrays))
+    )
+
+
 class BaseModel(PydanticBaseModel):
     """Overrides Pydantic BaseModel to set our own config."""
 
@@ -164,6 +223,54 @@ class FileModel(BaseModel, ABC):
 class TableModel(FileModel, Generic[TableT]):
     df: DataFrame[TableT] | None = Field(default=None, exclude=True, repr=False)
     _sort_keys: list[str] = PrivateAttr(default=[])
+    _version: int = PrivateAttr(default_factory=lambda: next(table_versions))
+    # The file to read the table from on first access, see `Model.read(lazy=True)`
+    _lazy_source: Path | None = PrivateAttr(default=None)
+    # The compression of the Arrow file, see `set_compression`
+    _compression: Literal["zstd", "lz4", "uncompressed"] = PrivateAttr(default="zstd")
+    # The database and key or fingerprint of the table as last read or written,
+    # such that unchanged tables are not rewritten, see `Model._save`
+    _saved: tuple[Path, tuple[Any, ...] | bytes] | None = PrivateAttr(default=None)
+    # Weak references to the immutable Arrow data of the frame that last passed
+    # validation, such that assigning it again is not validated, see `_is_validated`
+    _validated: tuple[Any, ...] | None = PrivateAttr(default=None)
+
+    @validate_call
+    def set_compression(
+        self, compression: Literal["zstd", "lz4", "uncompressed"]
+    ) -> None:
+        """Set the compression of the Arrow file of this table, see `set_filepath`.
+
+        Uncompressed files are memory-mapped on reading, such that processes
+        that read the same file share a single copy of it in memory.
+
+        Args:
+            compression (str): One of "zstd" (the default), "lz4" or "uncompressed".
+        """
+        if self._lazy_source is not None:
+            # Otherwise the file would be copied as is
+            self._load_lazily()
+        self._compression = compression
+
+    @validate_call
+    def set_filepath(self, filepath: Path) -> None:
+        """Set the filepath of this instance, to write the table to an Arrow file.
+
+        Args:
+            filepath (Path): The filepath to set.
+        """
+        if self._lazy_source is not None and self.filepath is None:
+            # The table is read from the database, so cannot be copied as is to an Arrow file
+            self._load_lazily()
+        super().set_filepath(filepath)
+
+    @field_validator("df", mode="before")
+    @classmethod
+    def _convert_arrow(cls, v: Any) -> Any:
+        """Allow assigning an Arrow table, which is converted without copying."""
+        if isinstance(v, pa.Table):
+            return cls._to_pandas(v)
+        return v
 
     @field_validator("df")
     @classmethod
@@ -171,11 +278,9 @@ class TableModel(FileModel, Generic[TableT]):
         """Allow only extra columns with `meta_` prefix."""
         if isinstance(v, pd.DataFrame | gpd.GeoDataFrame):
             # On reading from geopackage, migrate the tables when necessary
-            db_path = context_file_loading.get().get("database")
-            if db_path is not None:
-                version = _get_db_schema_version(db_path)
-                if version < ribasim.__schema_version__:
-                    v = cls.tableschema().migrate(v, version)
+            version = context_file_loading.get().get("schema_version")
+            if version is not None and version < ribasim.__schema_version__:
+                v = cls.tableschema().migrate(v, version)
             for colname in v.columns:
                 if colname not in cls.columns() and not colname.startswith("meta_"):
                     raise ValueError(
@@ -183,6 +288,163 @@ class TableModel(FileModel, Generic[TableT]):
                     )
         return v
 
+    @field_validator("df", mode="wrap")
+    @classmethod
+    def _skip_cached(
+        cls, v: Any, handler: ValidatorFunctionWrapHandler, info: ValidationInfo
+    ) -> Any:
+        # Tables from the read cache were validated before they were cached, see `ReadCache`.
+        # Tables in Arrow files are not cached, but read from the file.
+        if (
+            "cache_entry" in context_file_loading.get()
+            and info.data.get("filepath") is None
+        ):
+            return v
+        return handler(v)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        deferred = context_batch_edit.get()
+        if name == "df" and deferred is not None:
+            # Skip validation, the table is validated at the end of the batch edit.
+            self.__dict__[name] = value
+            self.__pydantic_fields_set__.add(name)
+            deferred[id(self)] = self
+        elif name == "df" and self._is_validated(value):
+            # Skip validation, the data is unchanged since it passed validation.
+            self.__dict__[name] = value
+            self.__pydantic_fields_set__.add(name)
+        else:
+            super().__setattr__(name, value)
+        if name == "df":
+            self._version = next(table_versions)
+            # The assigned table replaces the one in the file it was read from
+            self._lazy_source = None
+            self._saved = None
+
+    if not TYPE_CHECKING:
+        # Like pydantic, which only defines `__getattr__` when not type checking
+        def __getattr__(self, name: str) -> Any:
+            if name == "df" and self._lazy_source is not None:
+                self._load_lazily()
+                return self.__dict__["df"]
+            return super().__getattr__(name)
+
+    @model_validator(mode="after")
+    def _set_validated(self) -> "TableModel[TableT]":
+        df = self.__dict__.get("df")
+        self._validated = None if df is None else self._validation_key(df)
+        return self
+
+    def _validation_key(self, df: Any) -> tuple[Any, ...] | None:
+        """Identify the data of the validated columns and the index of the frame."""
+        if not isinstance(df, pd.DataFrame):
+            return None
+        return _frame_key(df, self.columns())
+
+    def _is_validated(self, df: Any) -> bool:
+        """Whether the frame has the same data as the frame that last passed validation."""
+        return self._validated is not None and _same_frame(
+            self._validated, self._validation_key(df)
+        )
+
+    @model_validator(mode="after")
+    def _set_lazy_source(self) -> "TableModel[TableT]":
+        context = context_file_loading.get()
+        if (
+            context.get("lazy")
+            and self._loads_lazily()
+            and "df" in self.__dict__
+            and "df" not in self.model_fields_set
+        ):
+            if self.filepath is not None:
+                self._lazy_source = context.get("directory", Path(".")) / self.filepath
+            elif self.tablename() in context["tables"]:
+                self._lazy_source = context["database"]
+            if self._lazy_source is not None:
+                # Remove the field, such that the first access goes through `__getattr__`
+                del self.__dict__["df"]
+        return self
+
+    @model_validator(mode="after")
+    def _set_compression(self) -> "TableModel[TableT]":
+        """Keep the compression of the Arrow file that is read, see `_write_arrow`."""
+        context = context_file_loading.get()
+        if self.filepath is not None and "database" in context:
+            path = context.get("directory", Path(".")) / self.filepath
+            with pa.memory_map(str(path)) as source:
+                metadata = pa.ipc.open_file(source).schema.metadata or {}
+            compression = metadata.get(COMPRESSION_KEY)
+            if compression is not None:
+                self._compression = compression.decode()
+        return self
+
+    @model_validator(mode="after")
+    def _set_saved(self) -> "TableModel[TableT]":
+        context = context_file_loading.get()
+        if (
+            context.get("up_to_date")
+            and self.filepath is None
+            and self._saved is None
+            and self.__dict__.get("df") is not None
+        ):
+            self._set_saved_in(context["database"], fingerprint=False)
+        return self
+
+    def _set_saved_in(self, db_path: Path, fingerprint: bool = True) -> None:
+        """Remember that the table is stored as is in the database.
+
+        Frames with only Arrow backed columns are identified by their data.
+        Other frames can be changed in place, so are only remembered by a hash of
+        their content when `fingerprint` is set, which is done on writing.
+        """
+        if self.filepath is not None:
+            self._saved = None
+        elif self._lazy_source is not None:
+            self._lazy_source = db_path
+        elif self.df is not None:
+            key: tuple[Any, ...] | bytes | None = _frame_key(self.df, self.df.columns)
+            if key is None and fingerprint:
+                key = _fingerprint(self.df)
+            self._saved = None if key is None else (db_path.resolve(), key)
+        else:
+            self._saved = None
+
+    def _is_saved_in(self, db_path: Path) -> bool:
+        """Whether the table is unchanged since it was last read from or written to the database."""
+        if self.filepath is not None:
+            return False
+        elif self._lazy_source is not None:
+            return self._lazy_source.resolve() == db_path.resolve()
+        elif self._saved is None or self.df is None:
+            return False
+        path, key = self._saved
+        if path != db_path.resolve():
+            return False
+        elif isinstance(key, bytes):
+            return key == _fingerprint(self.df)
+        return _same_frame(key, _frame_key(self.df, self.df.columns))
+
+    @classmethod
+    def _loads_lazily(cls) -> bool:
+        return not issubclass(cls, SpatialTableModel)
+
+    def _load_lazily(self) -> None:
+        source = self._lazy_source
+        assert source is not None
+        load = (
+            partial(self._from_arrow, source)
+            if self.filepath is not None
+            else partial(self._from_db, source, self.tablename())
+        )
+        self._lazy_source = None
+        self.df = load()
+        if self.filepath is None:
+            self._set_saved_in(source, fingerprint=False)
+
+    def _has_data(self) -> bool:
+        """Whether the table contains data, without loading a lazily loaded table."""
+        return self._lazy_source is not None or self.df is not None
+
     @model_serializer
     def _set_model(self) -> str | None:
         return str(self.filepath.name) if self.filepath is not None else None
@@ -230,11 +492,17 @@ class TableModel(FileModel, Generic[TableT]):
 
     @classmethod
     def _load(cls, filepath: Path | None) -> dict[str, Any]:
-        db = context_file_loading.get().get("database")
-        if filepath is not None and db is not None:
+        context = context_file_loading.get()
+        db = context.get("database")
+        if context.get("lazy") and cls._loads_lazily():
+            # Loaded on first access, see `_set_lazy_source`
+            return {}
+        elif filepath is not None and db is not None:
             adf = cls._from_arrow(filepath)
             # TODO Store filepath?
             return {"df": adf}
+        elif "cache_entry" in context:
+            return {"df": cls._from_cache(context["cache_entry"])}
         elif db is not None:
             ddf = cls._from_db(db, cls.tablename())
             return {"df": ddf}
@@ -243,17 +511,23 @@ class TableModel(FileModel, Generic[TableT]):
 
     def _save(self, directory: DirectoryPath, input_dir: DirectoryPath) -> None:
         # TODO directory could be used to save an arrow file
-        db_path = context_file_writing.get().get("database")
+        connection = context_file_writing.get().get("connection")
+        if self._lazy_source is not None:
+            # Never accessed, copy the table as is.
+            self._copy(directory, input_dir, connection)
+            return
         self.sort()
         if self.filepath is not None:
             self._write_arrow(self.filepath, directory, input_dir)
-        elif db_path is not None:
-            self._write_geopackage(db_path)
+        elif connection is not None:
+            self._write_geopackage(connection)
 
-    def _write_geopackage(self, temp_path: Path) -> None:
+    def _write_geopackage(self, connection: Connection) -> None:
         """
         Write the contents of the input to a database.
 
+        The caller is responsible for committing, see `Model._save`.
+
         Parameters
         ----------
         connection : Connection
@@ -261,43 +535,50 @@ class TableModel(FileModel, Generic[TableT]):
         """
         assert self.df is not None
         table = self.tablename()
-
-        with closing(connect(temp_path)) as connection:
-            self.df.to_sql(
-                table,
-                connection,
-                index=True,
-                if_exists="replace",
-                dtype={"fid": "INTEGER PRIMARY KEY AUTOINCREMENT"},
-            )
-
+        _write_table(connection, table, self.df)
+        _set_gpkg_attribute_table(connection, table)
+
+    def _copy(
+        self, directory: Path, input_dir: Path, connection: Connection | None
+    ) -> None:
+        """Copy the table from its lazy source, without reading it."""
+        assert self._lazy_source is not None
+        if self.filepath is not None:
+            path = directory / input_dir / self.filepath
+            if path.resolve() != self._lazy_source.resolve():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(self._lazy_source, path)
+        elif connection is not None:
+            table = self.tablename()
+            _copy_table(connection, self._lazy_source, table)
             _set_gpkg_attribute_table(connection, table)
-            # Set geopackage attribute table
 
     def _write_arrow(self, filepath: Path, directory: Path, input_dir: Path) -> None:
         """Write the contents of the input to a an arrow file."""
         assert self.df is not None
         path = directory / input_dir / filepath
         path.parent.mkdir(parents=True, exist_ok=True)
-        self.df.to_feather(
-            path,
-            compression="zstd",
-            compression_level=6,
+        # Write to a temporary file first, since the existing file may be memory-mapped.
+        temp_path = path.with_name(f".{path.name}")
+        table = self.to_arrow()
+        feather.write_feather(
+            table.replace_schema_metadata(
+                {**(table.schema.metadata or {}), **self._compression_metadata()}
+            ),
+            temp_path,
+            compression=self._compression,
+            compression_level=6 if self._compression == "zstd" else None,
         )
+        temp_path.replace(path)
 
     @classmethod
     def _from_db(cls, path: Path, table: str) -> pd.DataFrame | None:
         with closing(connect(path)) as connection:
             if exists(connection, table):
-                query = f"select * from {esc_id(table)}"
-                df = pd.read_sql_query(
-                    query,
-                    connection,
-                    # we store TIMESTAMP in SQLite like "2025-05-29 14:16:00"
-                    # see https://www.sqlite.org/lang_datefunc.html
-                    parse_dates={"time": {"format": "ISO8601"}},
-                    dtype_backend="pyarrow",
-                )
+                # we store TIMESTAMP in SQLite like "2025-05-29 14:16:00"
+                # see https://www.sqlite.org/lang_datefunc.html
+                data = _read_table(connection, table, cls._arrow_schema())
+                df = cls._to_pandas(data)
                 df.set_index("fid", inplace=True)
             else:
                 df = None
@@ -307,7 +588,155 @@ class TableModel(FileModel, Generic[TableT]):
     @classmethod
     def _from_arrow(cls, path: Path) -> pd.DataFrame:
         directory = context_file_loading.get().get("directory", Path("."))
-        return pd.read_feather(directory / path, dtype_backend="pyarrow")
+        # Uncompressed files are used directly from the memory map, without copying
+        return cls._to_pandas(feather.read_table(directory / path, memory_map=True))
+
+    @classmethod
+    def _cache_name(cls) -> str:
+        return cls.tablename().replace(delimiter, "_") + ".arrow"
+
+    def _write_cache(self, entry: Path) -> None:
+        """Write the validated table to an entry of the read cache, see `ReadCache`."""
+        if self.filepath is None and self.df is not None:
+            # The pandas metadata restores the exact dtypes on reading
+            data = pa.Table.from_pandas(self.df)
+            feather.write_feather(data, entry / self._cache_name(), compression="lz4")
+
+    @classmethod
+    def _from_cache(cls, entry: dict[str, Path]) -> pd.DataFrame | None:
+        path = entry.get(cls._cache_name())
+        return None if path is None else feather.read_table(path).to_pandas()
+
+    @classmethod
+    @cache
+    def _arrow_schema(cls) -> pa.Schema:
+        """Derive the Arrow types of the columns from the pandera schema."""
+        columns = cls.tableschema().to_schema().columns
+        return pa.schema(
+            [
+                (name, column.dtype.type.pyarrow_dtype)
+                for name, column in columns.items()
+                if isinstance(column.dtype.type, pd.ArrowDtype)
+            ]
+        )
+
+    @classmethod
+    def _to_pandas(cls, data: pa.Table) -> pd.DataFrame:
+        """
+        Convert an Arrow table to a DataFrame, without copying the data.
+
+        The columns are cast to the Arrow types of the schema first,
+        such that the coercion by pandera has nothing left to do.
+        """
+        return _cast(data, cls._arrow_schema()).to_pandas(types_mapper=pd.ArrowDtype)
+
+    def write_chunks(
+        self,
+        directory: str | PathLike[str],
+        chunks: Iterable[pd.DataFrame | pa.RecordBatch | pa.Table],
+        batch_size: int = 65_536,
+    ) -> None:
+        """Write the table of a written model from chunks of rows, without holding all of them.
+
+        Each chunk is validated and written in turn. Afterwards the table is read
+        on first access, as with `Model.read(lazy=True)`, and left as is on `Model.write`.
+        The chunks are not sorted, so should be produced in order, e.g. by time.
+
+        Parameters
+        ----------
+        directory : str | PathLike[str]
+            The input directory of the model, containing its database.gpkg.
+            A table with a filepath is written to that Arrow file instead.
+        chunks : Iterable[pd.DataFrame | pa.RecordBatch | pa.Table]
+            The rows of the table.
+        batch_size : int
+            The number of rows committed at once to the GeoPackage (Optional, defaults to 65536).
+        """
+        tablename = self.tablename()
+        if isinstance(self, SpatialTableModel):
+            raise ValueError(
+                f"Cannot write {tablename} in chunks: it is a spatial table."
+            )
+        db_path = Path(directory) / "database.gpkg"
+        if not db_path.is_file():
+            raise FileNotFoundError(f"Database file '{db_path}' does not exist.")
+
+        tables = self._validate_chunks(chunks)
+        if self.filepath is not None:
+            path = Path(directory) / self.filepath
+            self._write_arrow_chunks(path, tables)
+        else:
+            path = db_path
+            with closing(connect(db_path)) as connection:
+                _write_batches(connection, tablename, tables, batch_size, commit=True)
+                _set_gpkg_attribute_table(connection, tablename)
+                connection.commit()
+        # Read on first access, see `__getattr__`
+        self.__dict__.pop("df", None)
+        self._lazy_source = path
+        self._saved = None
+        self._version = next(table_versions)
+
+    def _validate_chunks(
+        self, chunks: Iterable[pd.DataFrame | pa.RecordBatch | pa.Table]
+    ) -> Generator[pa.Table, Any, None]:
+        """Validate the chunks, and number their rows consecutively."""
+        fid = 0
+        for chunk in chunks:
+            if isinstance(chunk, pa.RecordBatch):
+                chunk = pa.Table.from_batches([chunk])
+            df = type(self)(df=chunk).df
+            assert df is not None
+            df.index = pd.RangeIndex(fid, fid + len(df), name="fid")
+            fid += len(df)
+            yield _with_fid(df)
+        if fid == 0:
+            raise ValueError(
+                f"Cannot write {self.tablename()}: the chunks contain no rows."
+            )
+
+    def _compression_metadata(self) -> dict[bytes, bytes]:
+        """Store the compression in the Arrow file, such that reading restores it."""
+        return {COMPRESSION_KEY: self._compression.encode()}
+
+    def _write_arrow_chunks(self, path: Path, tables: Iterable[pa.Table]) -> None:
+        """Write the chunks to an Arrow file, replacing it once complete."""
+        temp_path = path.with_name(f".{path.name}")
+        compression = (
+            None
+            if self._compression == "uncompressed"
+            else pa.Codec(
+                self._compression,
+                compression_level=6 if self._compression == "zstd" else None,
+            )
+        )
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        writer = None
+        try:
+            for table in tables:
+                # The row numbers are implied by the order in the file
+                table = table.drop_columns("fid").replace_schema_metadata(
+                    self._compression_metadata()
+                )
+                if writer is None:
+                    schema = table.schema
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    writer = pa.ipc.new_file(temp_path, schema, options=options)
+                writer.write_table(table.cast(schema))
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            temp_path.unlink(missing_ok=True)
+            raise
+        assert writer is not None
+        writer.close()
+        temp_path.replace(path)
+
+    def to_arrow(self) -> pa.Table:
+        """Return the table as a pyarrow.Table, sharing the memory of the DataFrame."""
+        if self.df is None:
+            raise ValueError(f"Cannot convert {self.tablename()}: it contains no data.")
+        return pa.Table.from_pandas(self.df)
 
     def sort(self):
         """Sort the table as required.
@@ -315,9 +744,13 @@ class TableModel(FileModel, Generic[TableT]):
         Sorting is done automatically before writing the table.
         """
         if self.df is not None:
+            validated = self._is_validated(self.df)
             df = self.df.sort_values(self._sort_keys, ignore_index=True)
-            df.index.rename("fid", inplace=True)
-            self.df = df  # trigger validation and thus index coercion to int32
+            df.index = pd.Index(np.arange(len(df), dtype=np.int32), name="fid")
+            if validated:
+                # Sorting keeps the table valid
+                self._validated = self._validation_key(df)
+            self.df = df  # trigger validation, unless valid before sorting
 
     @classmethod
     def tableschema(cls) -> TableT:
@@ -361,6 +794,121 @@ class TableModel(FileModel, Generic[TableT]):
         # Index with .loc[..., :] to always return a DataFrame.
         return self.df.loc[self.df["node_id"].isin(np_index), :]
 
+    def scan(
+        self,
+        node_ids: Iterable[int] | None = None,
+        time_range: tuple[Any, Any] | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        """Select rows and columns of the table, without loading all of it.
+
+        For a table that is not loaded yet, see `Model.read(lazy=True)`, the selection
+        is done while reading the GeoPackage or Arrow file. Otherwise it is taken from the DataFrame.
+
+        Parameters
+        ----------
+        node_ids : Iterable[int], optional
+            Only select the rows of these nodes.
+        time_range : tuple, optional
+            Only select the rows with ``start <= time < end``.
+        columns : Sequence[str], optional
+            Only select these columns.
+        """
+        tablename = self.tablename()
+        if time_range is not None and "time" not in self.columns():
+            raise ValueError(f"Cannot scan {tablename} by time: it has no time column.")
+        if columns is not None:
+            unknown = [
+                c
+                for c in columns
+                if c not in self.columns() and not c.startswith("meta_")
+            ]
+            if unknown:
+                raise ValueError(f"{tablename} has no columns {unknown}.")
+        ids = None if node_ids is None else [int(node_id) for node_id in node_ids]
+        bounds = (
+            None
+            if time_range is None
+            else pa.array(pd.to_datetime(list(time_range)), pa.timestamp("ms"))
+        )
+
+        if self._lazy_source is not None and self.filepath is not None:
+            return self._scan_arrow(self._lazy_source, ids, bounds, columns)
+        elif self._lazy_source is not None:
+            return self._scan_db(self._lazy_source, ids, bounds, columns)
+        elif self.df is None:
+            raise ValueError(f"Cannot scan {tablename}: it contains no data.")
+
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        if ids is not None:
+            mask &= df["node_id"].isin(ids).to_numpy(dtype=bool)
+        if bounds is not None:
+            start, end = bounds.to_pylist()
+            time = df["time"]
+            mask &= ((time >= start) & (time < end)).to_numpy(
+                dtype=bool, na_value=False
+            )
+        return df.loc[mask, list(columns) if columns is not None else slice(None)]
+
+    def _scan_db(
+        self,
+        path: Path,
+        ids: list[int] | None,
+        bounds: pa.Array | None,
+        columns: Sequence[str] | None,
+    ) -> pd.DataFrame:
+        selection = (
+            "*" if columns is None else ", ".join(map(esc_id, ["fid", *columns]))
+        )
+        table = esc_id(self.tablename())
+        conditions = []
+        if ids is not None:
+            # The IDs are integers, so can safely be part of the query
+            conditions.append(f"node_id IN ({', '.join(map(str, ids))})")
+        if bounds is not None:
+            # Compare the text directly, such that the (node_id, time) index is used
+            conditions.append("time >= ? AND time < ?")
+        sql = f"SELECT {selection} FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with closing(connect(path)) as connection:
+            parameters: list[str] = []
+            if bounds is not None:
+                # Format the bounds like the stored timestamps, see `_format_timestamps`,
+                # which other applications may separate from the time with a "T".
+                formatted = _format_timestamps(bounds)
+                row = connection.execute(f"SELECT time FROM {table} LIMIT 1").fetchone()
+                if row is not None and "T" in str(row[0]):
+                    formatted = pc.replace_substring(formatted, " ", "T")
+                parameters.extend(formatted.to_pylist())
+            data = _read_query(connection, sql, self._arrow_schema(), parameters)
+        return self._to_pandas(data).set_index("fid")
+
+    def _scan_arrow(
+        self,
+        path: Path,
+        ids: list[int] | None,
+        bounds: pa.Array | None,
+        columns: Sequence[str] | None,
+    ) -> pd.DataFrame:
+        dataset = ds.dataset(path, format="ipc")
+        index = ["fid"] if "fid" in dataset.schema.names else []
+        expression = None
+        if ids is not None:
+            expression = pc.field("node_id").isin(ids)
+        if bounds is not None:
+            start, end = bounds
+            in_range = (pc.field("time") >= start) & (pc.field("time") < end)
+            expression = in_range if expression is None else expression & in_range
+        data = dataset.to_table(
+            columns=None if columns is None else [*index, *columns],
+            filter=expression,
+        )
+        # Only keep the index from the pandas metadata, which may list other columns
+        df = self._to_pandas(data.replace_schema_metadata(None))
+        return df.set_index(index) if index else df
+
 
 class SpatialTableModel(TableModel[TableT], Generic[TableT]):
     df: GeoDataFrame[TableT] | None = Field(default=None, exclude=True, repr=False)
@@ -390,10 +938,49 @@ class SpatialTableModel(TableModel[TableT], Generic[TableT]):
 
             return df
 
-    def _write_geopackage(self, path: Path) -> None:
+    def _write_cache(self, entry: Path) -> None:
+        if self.filepath is None and self.df is not None:
+            geometry = self.df.geometry
+            data = pa.Table.from_pandas(self.df.to_wkb())
+            metadata = {
+                **data.schema.metadata,
+                b"geometry": geometry.name,
+                b"crs": "" if geometry.crs is None else geometry.crs.to_wkt(),
+            }
+            feather.write_feather(
+                data.replace_schema_metadata(metadata),
+                entry / self._cache_name(),
+                compression="lz4",
+            )
+
+    @classmethod
+    def _from_cache(cls, entry: dict[str, Path]) -> gpd.GeoDataFrame | None:
+        path = entry.get(cls._cache_name())
+        if path is None:
+            return None
+        data = feather.read_table(path)
+        name = data.schema.metadata[b"geometry"].decode()
+        crs = data.schema.metadata[b"crs"].decode() or None
+        df = data.to_pandas()
+        df[name] = gpd.GeoSeries.from_wkb(df[name], crs=crs)
+        return gpd.GeoDataFrame(df, geometry=name, crs=crs)
+
+    def _save(self, directory: DirectoryPath, input_dir: DirectoryPath) -> None:
+        # GDAL opens the GeoPackage itself, so this is done before the attribute
+        # tables are written over a shared connection, see `Model._save`.
+        db_path = context_file_writing.get().get("database")
+        self.sort()
+        if self.filepath is not None:
+            self._write_arrow(self.filepath, directory, input_dir)
+        elif db_path is not None:
+            self._write_layer(db_path)
+
+    def _write_layer(self, path: Path) -> None:
         """
         Write the contents of the input to the GeoPackage.
 
+        The layer style is added separately, see `_add_styles_to_geopackage`.
+
         Parameters
         ----------
         path : Path
@@ -406,8 +993,8 @@ class SpatialTableModel(TableModel[TableT], Generic[TableT]):
             index=True,
             fid=self.df.index.name,
             engine="pyogrio",
+            layer_options={"SPATIAL_INDEX": "YES"},
         )
-        _add_styles_to_geopackage(path, self.tablename())
 
 
 class ChildModel(BaseModel):
@@ -457,7 +1044,7 @@ class NodeModel(ChildModel):
             attr = getattr(self, key)
             if (
                 isinstance(attr, TableModel)
-                and (attr.df is not None)
+                and attr._has_data()
                 and not (isinstance(attr, ribasim.geometry.node.NodeTable))
             ):
                 yield attr
@@ -468,10 +1055,6 @@ class NodeModel(ChildModel):
             node_ids.update(table._node_ids())
         return node_ids
 
-    def _save(self, directory: DirectoryPath, input_dir: DirectoryPath):
-        for table in self._tables():
-            table._save(directory, input_dir)
-
     def _repr_content(self) -> str:
         """Generate a succinct overview of the content.
 
@@ -481,7 +1064,7 @@ class NodeModel(ChildModel):
         for field in self._fields():
             attr = getattr(self, field)
             if isinstance(attr, TableModel):
-                if attr.df is not None:
+                if attr._has_data():
                     content.append(field)
             else:
                 content.append(field)
@@ -1,8 +1,27 @@
 import warnings
+from contextlib import closing
+from os import PathLike
+from pathlib import Path
+from sqlite3 import Connection, connect
+from typing import Any
 
+import tomli
 from geopandas import GeoDataFrame
 from pandas import DataFrame
 
+import ribasim
+from ribasim.db_utils import (
+    _drop_columns,
+    _get_db_schema_version,
+    _register_gpkg_functions,
+    _rename_db_column,
+    _rename_table,
+    _set_primary_key,
+    _write_db_schema_version,
+    exists,
+)
+from ribasim.styles import _add_styles_to_geopackage
+
 # On each breaking change, increment the __schema_version__ by one.
 # Do the same for write_schema_version in ribasim_qgis/core/geopackage.py
 
@@ -104,3 +123,92 @@ def outletstaticschema_migration(df: DataFrame, schema_version: int) -> DataFram
         _rename_column(df, "min_crest_level", "min_upstream_level")
 
     return df
+
+
+def migrate(filepath: str | PathLike[str]) -> None:
+    """Migrate the database of a model to the current schema version, in place.
+
+    Unlike reading and writing the model, this changes the tables with SQL
+    in a single transaction, without loading them.
+    Tables stored in Arrow files are not migrated, so a model with outdated
+    Arrow files is refused, see `Model.read` to migrate those.
+
+    Parameters
+    ----------
+    filepath : str | PathLike[str]
+        The path to the TOML file of the model.
+    """
+    filepath = Path(filepath)
+    if not filepath.is_file():
+        raise FileNotFoundError(f"File '{filepath}' does not exist.")
+    with open(filepath, "rb") as f:
+        config = tomli.load(f)
+    db_path = filepath.parent / config.get("input_dir", ".") / "database.gpkg"
+    if not db_path.is_file():
+        raise FileNotFoundError(f"Database file '{db_path}' does not exist.")
+
+    schema_version = _get_db_schema_version(db_path)
+    if schema_version >= ribasim.__schema_version__:
+        return
+    arrow_tables = _arrow_tables(config)
+    if arrow_tables:
+        # Only the GeoPackage is migrated, the outdated Arrow files would remain
+        raise ValueError(
+            f"Cannot migrate {filepath}: the tables {arrow_tables} are stored in "
+            "Arrow files. Use Model.read and Model.write to migrate it instead."
+        )
+    with closing(connect(db_path, isolation_level=None)) as connection:
+        _register_gpkg_functions(connection)
+        # Otherwise SQLite commits each schema change separately
+        connection.execute("BEGIN")
+        try:
+            _migrate_database(connection, schema_version)
+            _write_db_schema_version(connection, ribasim.__schema_version__)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+
+def _arrow_tables(config: dict[str, Any]) -> list[str]:
+    """Return the names of the tables of the model that are stored in Arrow files."""
+    fields = ribasim.model.Model.model_fields
+    names: list[str] = []
+    for key, section in config.items():
+        node_type = fields[key].annotation if key in fields else None
+        if (
+            isinstance(section, dict)
+            and isinstance(node_type, type)
+            and issubclass(node_type, ribasim.config.MultiNodeModel)
+        ):
+            names.extend(f"{node_type.__name__} / {table}" for table in section)
+    return names
+
+
+def _migrate_database(connection: Connection, schema_version: int) -> None:
+    """Apply the migrations above to the tables in the database, see `migrate`."""
+    if schema_version < 4 and exists(connection, "Edge"):
+        _rename_table(connection, "Edge", "Link")
+    if schema_version == 0:
+        _set_primary_key(connection, "Node", "node_id")
+        _drop_columns(connection, "Link", ["from_node_type", "to_node_type"])
+        _set_primary_key(connection, "Link", "edge_id")
+        _drop_columns(connection, "Basin / static", ["urban_runoff"])
+        _drop_columns(connection, "Basin / time", ["urban_runoff"])
+        for table in [
+            "ContinuousControl / variable",
+            "DiscreteControl / variable",
+            "PidControl / static",
+        ]:
+            _drop_columns(connection, table, ["listen_node_type"])
+    if schema_version < 2:
+        _rename_db_column(
+            connection, "Outlet / static", "min_crest_level", "min_upstream_level"
+        )
+    if schema_version < 3:
+        _drop_columns(connection, "Link", ["subnetwork_id"])
+    if schema_version < 4:
+        _rename_db_column(connection, "Link", "edge_id", "link_id")
+        _rename_db_column(connection, "Link", "edge_type", "link_type")
+        # The style of the Edge table was removed on renaming
+        _add_styles_to_geopackage(connection, ["Link"])
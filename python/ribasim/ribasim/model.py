@@ -2,15 +2,19 @@ import datetime
 import logging
 import shutil
 from collections.abc import Generator
+from contextlib import closing, contextmanager
 from os import PathLike
 from pathlib import Path
-from typing import Any
+from sqlite3 import connect
+from typing import Any, Literal
 
 import numpy as np
 import pandas as pd
 import tomli
 import tomli_w
 from matplotlib import pyplot as plt
+from numpy.typing import NDArray
+from pandera.errors import SchemaErrors
 from pandera.typing.geopandas import GeoDataFrame
 from pydantic import (
     DirectoryPath,
@@ -21,6 +25,7 @@ from pydantic import (
 )
 
 import ribasim
+from ribasim.cache import ReadCache
 from ribasim.config import (
     Allocation,
     Basin,
@@ -44,16 +49,27 @@ from ribasim.config import (
     Terminal,
     UserDemand,
 )
-from ribasim.db_utils import _set_db_schema_version
+from ribasim.db_utils import (
+    _drop_tables,
+    _get_db_schema_version,
+    _get_gpkg_contents,
+    _get_table_names,
+    _write_db_schema_version,
+)
 from ribasim.geometry.link import LinkSchema, LinkTable
 from ribasim.geometry.node import NodeTable
 from ribasim.input_base import (
     ChildModel,
     FileModel,
     SpatialTableModel,
+    TableModel,
+    context_batch_edit,
     context_file_loading,
     context_file_writing,
+    delimiter,
 )
+from ribasim.report import ValidationReport
+from ribasim.styles import _add_styles_to_geopackage
 from ribasim.utils import (
     MissingOptionalModule,
     UsedIDs,
@@ -61,9 +77,14 @@ from ribasim.utils import (
     _link_lookup,
     _node_lookup,
     _node_lookup_numpy,
+    _pascal_to_snake,
     _time_in_ns,
 )
-from ribasim.validation import control_link_neighbor_amount, flow_link_neighbor_amount
+from ribasim.validation import (
+    control_link_neighbor_amount,
+    flow_link_neighbor_amount,
+    node_type_connectivity,
+)
 
 try:
     import xugrid
@@ -111,6 +132,10 @@ class Model(FileModel):
     use_validation: bool = Field(default=True, exclude=True)
 
     _used_node_ids: UsedIDs = PrivateAttr(default_factory=UsedIDs)
+    # The versions of the node tables that the cached full node table was built from
+    _node_table_cache: tuple[tuple[int, ...], NodeTable] | None = PrivateAttr(
+        default=None
+    )
 
     @model_validator(mode="after")
     def _set_node_parent(self) -> "Model":
@@ -133,11 +158,16 @@ class Model(FileModel):
     def _update_used_ids(self) -> "Model":
         # Only update the used node IDs if we read from a database
         if "database" in context_file_loading.get():
-            df = self.node_table().df
-            assert df is not None
-            if len(df.index) > 0:
-                self._used_node_ids.node_ids.update(df.index)
-                self._used_node_ids.max_node_id = df.index.max()
+            # Use the per type node tables, to avoid building the full node table.
+            indices = []
+            for sub in self._nodes():
+                # Only node types with nodes are returned, see `_nodes`
+                assert sub.node.df is not None
+                indices.append(sub.node.df.index)
+                self._used_node_ids.update(sub.node.df.index)
+            assert len(self._used_node_ids.node_ids) == sum(map(len, indices)), (
+                "node_id must be unique"
+            )
         return self
 
     @field_serializer("input_dir", "results_dir")
@@ -199,25 +229,129 @@ class Model(FileModel):
         # and at the end move this over the target file.
         # This does not throw a PermissionError if the file is open in QGIS.
         db_path = directory / input_dir / ".database.gpkg"
+        target = db_path.with_name("database.gpkg")
 
         # avoid adding tables to existing model
         db_path.parent.mkdir(parents=True, exist_ok=True)
         db_path.unlink(missing_ok=True)
-        context_file_writing.get()["database"] = db_path
+        context = context_file_writing.get()
+        context["database"] = db_path
 
-        self.link._save(directory, input_dir)
         node = self.node_table()
-
         assert node.df is not None
-        node._save(directory, input_dir)
-
-        # Run after geopackage schema has been created
-        _set_db_schema_version(db_path, ribasim.__schema_version__)
-
-        for sub in self._nodes():
-            sub._save(directory, input_dir)
-
-        shutil.move(db_path, db_path.with_name("database.gpkg"))
+        tables = [table for sub in self._nodes() for table in sub._tables()]
+        layers: list[TableModel[Any]] = [
+            self.link,
+            node,
+            *(table for table in tables if isinstance(table, SpatialTableModel)),
+        ]
+        unchanged, stale = self._unchanged_tables(target, layers + tables)
+        if unchanged:
+            # Only rewrite the changed tables in a copy of the existing GeoPackage
+            shutil.copyfile(target, db_path)
+
+        # GDAL writes the spatial layers and creates the geopackage schema
+        for layer in layers:
+            if layer.tablename() not in unchanged:
+                layer._save(directory, input_dir)
+
+        # All other tables are written in a single transaction over a shared connection.
+        # Since the file is only moved in place at the end, a journal is not needed.
+        with closing(connect(db_path)) as connection:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            context["connection"] = connection
+            try:
+                _drop_tables(connection, stale)
+                _write_db_schema_version(connection, ribasim.__schema_version__)
+                _add_styles_to_geopackage(
+                    connection, [layer.tablename() for layer in layers]
+                )
+                for table in tables:
+                    if (
+                        not isinstance(table, SpatialTableModel)
+                        and table.tablename() not in unchanged
+                    ):
+                        table._save(directory, input_dir)
+                connection.commit()
+            finally:
+                del context["connection"]
+
+        shutil.move(db_path, target)
+
+        for table in [self.link] + tables:
+            if table.tablename() not in unchanged:
+                table._set_saved_in(target)
+        if "Node" not in unchanged:
+            for sub in self._multi_nodes():
+                sub.node._set_saved_in(target)
+
+    def _unchanged_tables(
+        self, db_path: Path, tables: list[TableModel[Any]]
+    ) -> tuple[set[str], set[str]]:
+        """Find the tables that are unchanged since they were last read from or written to the database.
+
+        Also returns the stale attribute tables in the database that are no longer part of the model.
+        If the database cannot be updated in place, no tables are considered unchanged.
+        """
+        if not db_path.is_file():
+            return set(), set()
+        unchanged = {
+            table.tablename() for table in tables if table._is_saved_in(db_path)
+        }
+        if all(
+            sub.node._is_saved_in(db_path)
+            or (sub.node._saved is None and (sub.node.df is None or sub.node.df.empty))
+            for sub in self._multi_nodes()
+        ):
+            unchanged.add("Node")
+        if not unchanged:
+            return set(), set()
+
+        contents = _get_gpkg_contents(db_path)
+        names = {table.tablename() for table in tables if table.filepath is None}
+        stale = contents.keys() - names - {"ribasim_metadata", "layer_styles"}
+        if any(contents[name] != "attributes" for name in stale):
+            # Spatial layers cannot be dropped without GDAL.
+            return set(), set()
+        return unchanged, stale
+
+    @contextmanager
+    def batch_edit(self) -> Generator[None, None, None]:
+        """Defer the validation of table assignments to the end of the block.
+
+        Every assignment like ``model.basin.static.df = df`` is normally validated directly.
+        Within this block, each table that is assigned to is validated only once, on exit.
+
+        Raises
+        ------
+        ValueError
+            When one or more of the edited tables are invalid, listing all of them.
+            The invalid tables keep their unvalidated content.
+        """
+        if context_batch_edit.get() is not None:
+            # Nested batch edit, validate at the end of the outer one.
+            yield
+            return
+
+        token = context_batch_edit.set({})
+        try:
+            yield
+        finally:
+            tables = context_batch_edit.get()
+            context_batch_edit.reset(token)
+
+        assert tables is not None
+        errors = []
+        for table in tables.values():
+            try:
+                table.df = table.df  # trigger validation
+            except ValueError as e:
+                errors.append(f"{table.tablename()}: {e}")
+        if errors:
+            raise ValueError(
+                f"Validation failed for {len(errors)} table(s):\n" + "\n".join(errors)
+            )
 
     def set_crs(self, crs: str) -> None:
         """Set the coordinate reference system of the data in the model.
@@ -244,9 +378,21 @@ class Model(FileModel):
                 if isinstance(table, SpatialTableModel) and table.df is not None:
                     getattr(table.df, function_name)(crs, inplace=True)
         self.crs = crs
+        # The node tables were modified in place
+        self._node_table_cache = None
 
     def node_table(self) -> NodeTable:
-        """Compute the full sorted NodeTable from all node types."""
+        """Compute the full sorted NodeTable from all node types.
+
+        The result is cached until the table of one of the node types is assigned to,
+        so the returned table should not be modified in place.
+        """
+        versions = tuple(sub.node._version for sub in self._nodes())
+        if self._node_table_cache is not None:
+            cached_versions, cached_node_table = self._node_table_cache
+            if cached_versions == versions:
+                return cached_node_table
+
         df_chunks = [node.node.df for node in self._nodes()]
         df = (
             _concat(df_chunks)
@@ -257,8 +403,16 @@ class Model(FileModel):
         node_table.sort()
         assert node_table.df is not None
         assert node_table.df.index.is_unique, "node_id must be unique"
+        self._node_table_cache = (versions, node_table)
         return node_table
 
+    def _multi_nodes(self) -> Generator[MultiNodeModel, Any, None]:
+        """Return all MultiNodeModel instances, including empty ones."""
+        for key in self.model_fields.keys():
+            attr = getattr(self, key)
+            if isinstance(attr, MultiNodeModel):
+                yield attr
+
     def _nodes(self) -> Generator[MultiNodeModel, Any, None]:
         """Return all non-empty MultiNodeModel instances."""
         for key in self.model_fields.keys():
@@ -279,19 +433,40 @@ class Model(FileModel):
         }
 
     @classmethod
-    def read(cls, filepath: str | PathLike[str]) -> "Model":
+    def read(
+        cls,
+        filepath: str | PathLike[str],
+        lazy: bool = False,
+        cache: ReadCache | None = None,
+    ) -> "Model":
         """Read a model from a TOML file.
 
         Parameters
         ----------
         filepath : str | PathLike[str]
             The path to the TOML file.
+        lazy : bool
+            Only read the non-spatial tables on first access (Optional, defaults to False).
+            Tables that are never accessed are copied as is on `write`.
+            This has no effect on models with an outdated database schema.
+        cache : ReadCache | None
+            Read the validated tables from this cache when the database is unchanged,
+            and add them otherwise (Optional, defaults to None).
+            This has no effect when reading lazily.
         """
         if not Path(filepath).is_file():
             raise FileNotFoundError(f"File '{filepath}' does not exist.")
-        return cls(filepath=filepath)  # type: ignore
+        token = context_file_loading.set({"lazy": lazy, "cache": cache})
+        try:
+            return cls(filepath=filepath)  # type: ignore
+        finally:
+            context_file_loading.reset(token)
 
-    def write(self, filepath: str | PathLike[str]) -> Path:
+    def write(
+        self,
+        filepath: str | PathLike[str],
+        format: Literal["geopackage", "arrow"] = "geopackage",
+    ) -> Path:
         """Write the contents of the model to disk and save it as a TOML configuration file.
 
         If ``filepath.parent`` does not exist, it is created before writing.
@@ -300,7 +475,18 @@ class Model(FileModel):
         ----------
         filepath : str | PathLike[str]
             A file path with .toml extension.
+        format : str, optional
+            With "geopackage", the default, all tables are written to the GeoPackage,
+            except for tables that have a filepath set.
+            With "arrow", every table gets its own Arrow file in the input directory.
+            Only the spatial layers Node, Link and Basin / area stay in the GeoPackage,
+            since that is where the core reads them from.
+            The filepaths of the tables are not changed, so a later write uses the GeoPackage.
         """
+        if format not in ("geopackage", "arrow"):
+            raise ValueError(
+                f"Unknown format '{format}', expected 'geopackage' or 'arrow'."
+            )
         if self.use_validation:
             self._validate_model()
 
@@ -311,130 +497,387 @@ class Model(FileModel):
         context_file_writing.set({})
         directory = filepath.parent
         directory.mkdir(parents=True, exist_ok=True)
-        self._save(directory, self.input_dir)
-        fn = self._write_toml(filepath)
+        with self._arrow_filepaths(enabled=format == "arrow"):
+            self._save(directory, self.input_dir)
+            fn = self._write_toml(filepath)
 
         context_file_writing.set({})
         return fn
 
-    def _validate_model(self):
-        df_link = self.link.df
-        df_chunks = [node.node.df for node in self._nodes()]
-        df_node = _concat(df_chunks)
+    @contextmanager
+    def _arrow_filepaths(self, enabled: bool = True) -> Generator[None, Any, None]:
+        """Set an Arrow file for every table that is not spatial and has none yet.
 
-        df_graph = df_link
-        # Join df_link with df_node to get to_node_type
-        df_graph = df_graph.join(
-            df_node[["node_type"]], on="from_node_id", how="left", rsuffix="_from"
-        )
-        df_graph = df_graph.rename(columns={"node_type": "from_node_type"})
+        The filepaths are only set within the block, such that a later write
+        writes these tables to the GeoPackage again.
+        """
+        tables = [
+            table
+            for sub in self._nodes()
+            for table in sub._tables()
+            if enabled
+            and table.filepath is None
+            and not isinstance(table, SpatialTableModel)
+        ]
+        for table in tables:
+            node_type, field = table.tablename().split(delimiter)
+            table.set_filepath(Path(f"{_pascal_to_snake(node_type)}_{field}.arrow"))
+        try:
+            yield
+        finally:
+            for table in tables:
+                # Like `set_filepath`, which does not accept None
+                table.model_config["validate_assignment"] = False
+                table.filepath = None
+                table.model_config["validate_assignment"] = True
+
+    def validation_report(self) -> ValidationReport:
+        """Check the model, and report all problems found instead of raising on the first.
+
+        The tables are checked against their schema and for references to unknown nodes
+        or nodes of another type. The links are checked for unknown nodes, node types
+        that cannot be connected, duplicates, and the number of in- and outneighbors
+        of each node.
+        Tables that are read lazily and not accessed yet are not checked.
 
-        df_graph = df_graph.join(
-            df_node[["node_type"]], on="to_node_id", how="left", rsuffix="_to"
+        Returns
+        -------
+        ValidationReport
+            The problems found, with one row per problem in its DataFrame ``df``.
+        """
+        return ValidationReport._concat(
+            [
+                self._schema_report(),
+                self._reference_report(),
+                self._link_report(),
+                self._neighbor_report(),
+            ]
         )
-        df_graph = df_graph.rename(columns={"node_type": "to_node_type"})
 
-        if not self._has_valid_neighbor_amount(
-            df_graph, flow_link_neighbor_amount, "flow", df_node["node_type"]
-        ):
-            raise ValueError("Minimum flow inneighbor or outneighbor unsatisfied")
-        if not self._has_valid_neighbor_amount(
-            df_graph, control_link_neighbor_amount, "control", df_node["node_type"]
-        ):
-            raise ValueError("Minimum control inneighbor or outneighbor unsatisfied")
+    def _schema_report(self) -> ValidationReport:
+        tables: list[TableModel[Any]] = [self.link]
+        for sub in self._nodes():
+            tables.extend([sub.node, *sub._tables()])
+        reports = []
+        for table in tables:
+            df = table.__dict__.get("df")
+            if df is None:
+                continue
+            try:
+                table.tableschema().validate(df, lazy=True)
+            except SchemaErrors as e:
+                cases = e.failure_cases
+                index = cases["index"].to_numpy()
+                if df.index.name == "node_id":
+                    node_id = index
+                elif "node_id" in df.columns and df.index.is_unique:
+                    node_id = df["node_id"].reindex(index).array
+                else:
+                    node_id = None
+                message = (
+                    "Column '"
+                    + cases["column"].astype(str)
+                    + "' failed check '"
+                    + cases["check"].astype(str)
+                    + "' in row "
+                    + cases["index"].astype(str)
+                    + " with value "
+                    + cases["failure_case"].astype(str)
+                )
+                reports.append(
+                    ValidationReport._from_arrays(
+                        table.tablename(), "schema", message, node_id
+                    )
+                )
+        return ValidationReport._concat(reports)
 
-    def _has_valid_neighbor_amount(
-        self,
-        df_graph: pd.DataFrame,
-        link_amount: dict[str, list[int]],
-        link_type: str,
-        nodes,
-    ) -> bool:
-        """Check if the neighbor amount of the two nodes connected by the given link meet the minimum requirements."""
-        is_valid = True
-
-        # filter graph by link type
-        df_graph = df_graph.loc[df_graph["link_type"] == link_type]
-
-        # count occurrence of "from_node" which reflects the number of outneighbors
-        from_node_count = (
-            df_graph.groupby("from_node_id").size().reset_index(name="from_node_count")
+    def _link_report(self) -> ValidationReport:
+        df_link = self.link.df
+        if df_link is None or df_link.empty:
+            return ValidationReport._concat([])
+        df_node = self.node_table().df
+        assert df_node is not None
+        node_type = df_node["node_type"]
+        link_id = df_link.index.astype(str)
+        reports = []
+        for column in ("from_node_id", "to_node_id"):
+            node_id = df_link[column].to_numpy(dtype=np.int64)
+            unknown = ~np.isin(node_id, node_type.index.to_numpy())
+            reports.append(
+                ValidationReport._from_arrays(
+                    "Link",
+                    "unknown_node",
+                    "Link "
+                    + link_id[unknown]
+                    + f" has {column} "
+                    + node_id[unknown].astype(str)
+                    + ", which is not in the Node table",
+                    node_id[unknown],
+                )
+            )
+
+        from_type = node_type.reindex(df_link["from_node_id"]).to_numpy(dtype=object)
+        to_type = node_type.reindex(df_link["to_node_id"]).to_numpy(dtype=object)
+        allowed = pd.MultiIndex.from_tuples(
+            [
+                (up, down)
+                for up, downs in node_type_connectivity.items()
+                for down in downs
+            ]
+        )
+        pairs = pd.MultiIndex.from_arrays([from_type, to_type])
+        invalid = ~pairs.isin(allowed) & pd.notna(from_type) & pd.notna(to_type)
+        reports.append(
+            ValidationReport._from_arrays(
+                "Link",
+                "connectivity",
+                "Link "
+                + link_id[invalid]
+                + ": node of type "
+                + to_type[invalid].astype(str)
+                + " cannot be downstream of node of type "
+                + from_type[invalid].astype(str),
+                df_link["to_node_id"].to_numpy()[invalid],
+            )
         )
 
-        # append from_node_count column to from_node_id and from_node_type
-        from_node_info = (
-            df_graph[["from_node_id", "from_node_type"]]
-            .drop_duplicates()
-            .merge(from_node_count, on="from_node_id", how="left")
+        duplicate = df_link.duplicated(["from_node_id", "to_node_id"]).to_numpy()
+        reports.append(
+            ValidationReport._from_arrays(
+                "Link",
+                "duplicate_link",
+                "Link "
+                + link_id[duplicate]
+                + " from node "
+                + df_link["from_node_id"].astype(str).to_numpy()[duplicate]
+                + " to node "
+                + df_link["to_node_id"].astype(str).to_numpy()[duplicate]
+                + " already exists",
+                df_link["from_node_id"].to_numpy()[duplicate],
+            )
         )
-        from_node_info = from_node_info[
-            ["from_node_id", "from_node_count", "from_node_type"]
-        ]
+        return ValidationReport._concat(reports)
 
-        # add the node that is not the upstream of any other nodes
-        from_node_info = self._add_source_sink_node(nodes, from_node_info, "from")
+    def _reference_report(self) -> ValidationReport:
+        """Check that the tables of each node type refer to existing nodes.
 
-        # loop over all the "from_node" and check if they have enough outneighbor
-        for _, row in from_node_info.iterrows():
-            # from node's outneighbor
-            if row["from_node_count"] < link_amount[row["from_node_type"]][2]:
-                is_valid = False
-                logging.error(
-                    f"Node {row['from_node_id']} must have at least {link_amount[row['from_node_type']][2]} outneighbor(s) (got {row['from_node_count']})"
+        The node_id must be a node of the type of the table, and listen_node_id any node.
+        Tables that are read lazily and not accessed yet are not checked.
+        """
+        df_node = self.node_table().df
+        assert df_node is not None
+        # Sorted by node_table
+        node_id = df_node.index.to_numpy(dtype=np.int64)
+        types, type_code = np.unique(
+            df_node["node_type"].to_numpy(dtype=object).astype(str),
+            return_inverse=True,
+        )
+        max_id = node_id[-1] if len(node_id) else -1
+        # A dense lookup from node_id to node type is much faster than a binary search
+        # for unsorted tables, use it if it is small enough. The last entry is unknown.
+        lookup = None
+        if max_id < 2**24:
+            lookup = np.full(max_id + 2, -1, dtype=np.int8)
+            lookup[node_id] = type_code
+
+        def node_type_code(
+            ids: NDArray[np.int64],
+        ) -> NDArray[np.signedinteger[Any]]:
+            """Return the index in types of the node type of each node, -1 if unknown."""
+            if lookup is not None:
+                return lookup[np.where((ids < 0) | (ids > max_id), max_id + 1, ids)]
+            position = np.searchsorted(node_id, ids).clip(max=max(len(node_id) - 1, 0))
+            if not len(node_id):
+                return np.full(len(ids), -1)
+            return np.where(node_id[position] == ids, type_code[position], -1)
+
+        reports = []
+        for sub in self._multi_nodes():
+            node_type = sub.get_input_type()
+            # The code of the node type of the tables, there may be no such nodes
+            expected = types.tolist().index(node_type) if node_type in types else -1
+            for table in sub._tables():
+                df = table.__dict__.get("df")
+                if df is None or df.empty:
+                    continue
+                for column in ("node_id", "listen_node_id"):
+                    if column not in df.columns:
+                        continue
+                    ids = df[column].to_numpy(dtype=np.int64, na_value=-1)
+                    # Tables are mostly sorted by node_id, look up each run only once
+                    is_first = np.empty(len(ids), dtype=bool)
+                    is_first[0] = True
+                    np.not_equal(ids[1:], ids[:-1], out=is_first[1:])
+                    ids = ids[is_first]
+                    code = node_type_code(ids)
+
+                    unknown = np.unique(ids[code < 0])
+                    reports.append(
+                        ValidationReport._from_arrays(
+                            table.tablename(),
+                            "unknown_node",
+                            f"{table.tablename()} has {column} "
+                            + unknown.astype(str)
+                            + ", which is not in the Node table",
+                            unknown,
+                        )
+                    )
+                    if column != "node_id":
+                        continue
+                    wrong_type = (code >= 0) & (code != expected)
+                    wrong_ids, first = np.unique(ids[wrong_type], return_index=True)
+                    reports.append(
+                        ValidationReport._from_arrays(
+                            table.tablename(),
+                            "node_type",
+                            f"{table.tablename()} has node_id "
+                            + wrong_ids.astype(str)
+                            + ", which is a "
+                            + types[code[wrong_type][first]]
+                            + f" node instead of a {node_type} node",
+                            wrong_ids,
+                        )
+                    )
+        return ValidationReport._concat(reports)
+
+    def _neighbor_report(self) -> ValidationReport:
+        violations = self._neighbor_violations()
+        too_few = (violations["count"] < violations["minimum"]).to_numpy()
+        messages = self._neighbor_messages(violations)
+        return ValidationReport._concat(
+            [
+                ValidationReport._from_arrays(
+                    "Link",
+                    rule,
+                    messages[selection],
+                    violations["node_id"].to_numpy()[selection],
                 )
-
-        # count occurrence of "to_node" which reflects the number of inneighbors
-        to_node_count = (
-            df_graph.groupby("to_node_id").size().reset_index(name="to_node_count")
+                for rule, selection in (
+                    ("min_neighbors", too_few),
+                    ("max_neighbors", ~too_few),
+                )
+            ]
         )
 
-        # append to_node_count column to result
-        to_node_info = (
-            df_graph[["to_node_id", "to_node_type"]]
-            .drop_duplicates()
-            .merge(to_node_count, on="to_node_id", how="left")
+    @staticmethod
+    def _neighbor_messages(violations: pd.DataFrame) -> NDArray[np.object_]:
+        node = "Node " + violations["node_id"].astype(str)
+        direction = " " + violations["direction"] + "neighbor(s) (got "
+        count = violations["count"].astype(str) + ")"
+        too_few = (
+            node
+            + " must have at least "
+            + violations["minimum"].astype(str)
+            + direction
+            + count
         )
-        to_node_info = to_node_info[["to_node_id", "to_node_count", "to_node_type"]]
-
-        # add the node that is not the downstream of any other nodes
-        to_node_info = self._add_source_sink_node(nodes, to_node_info, "to")
+        too_many = (
+            node
+            + " can have at most "
+            + violations["maximum"].astype(str)
+            + " "
+            + violations["link_type"]
+            + " link"
+            + direction
+            + count
+        )
+        return np.where(
+            violations["count"] < violations["minimum"], too_few, too_many
+        ).astype(object)
 
-        # loop over all the "to_node" and check if they have enough inneighbor
-        for _, row in to_node_info.iterrows():
-            if row["to_node_count"] < link_amount[row["to_node_type"]][0]:
-                is_valid = False
-                logging.error(
-                    f"Node {row['to_node_id']} must have at least {link_amount[row['to_node_type']][0]} inneighbor(s) (got {row['to_node_count']})"
+    def _validate_model(self):
+        violations = self._neighbor_violations()
+        # Only the minimum is checked here, the maximum is checked on adding links
+        violations = violations[violations["count"] < violations["minimum"]]
+        messages = self._neighbor_messages(violations)
+        for link_type in ("flow", "control"):
+            is_type = (violations["link_type"] == link_type).to_numpy()
+            for message in messages[is_type]:
+                logging.error(message)
+            if is_type.any():
+                raise ValueError(
+                    f"Minimum {link_type} inneighbor or outneighbor unsatisfied"
                 )
 
-        return is_valid
+        references = self._reference_report()
+        for message in references.df["message"]:
+            logging.error(message)
+        if not references.is_valid:
+            raise ValueError("Tables refer to unknown nodes or nodes of another type")
 
-    def _add_source_sink_node(
-        self, nodes, node_info: pd.DataFrame, direction: str
-    ) -> pd.DataFrame:
-        """Loop over node table.
+    def _neighbor_violations(self) -> pd.DataFrame:
+        """Find the nodes with too few or too many in- or outneighbors.
 
-        Add the nodes whose id are missing in the from_node and to_node column in the link table because they are not the upstream or downstrem of other nodes.
-
-        Specify that their occurrence in from_node table or to_node table is 0.
+        Returns
+        -------
+        pd.DataFrame
+            One row per violation, with the node_id, node_type, link_type,
+            direction ("in" or "out"), the count of neighbors and the allowed
+            minimum and maximum.
         """
-        # loop over nodes, add the one that is not the downstream (from) or upstream (to) of any other nodes
-        for index, node in enumerate(nodes):
-            if nodes.index[index] not in node_info[f"{direction}_node_id"].to_numpy():
-                new_row = {
-                    f"{direction}_node_id": nodes.index[index],
-                    f"{direction}_node_count": 0,
-                    f"{direction}_node_type": node,
-                }
-                node_info = _concat(
-                    [node_info, pd.DataFrame([new_row])], ignore_index=True
-                )
+        df_link = self.link.df
+        df_node = self.node_table().df
+        assert df_node is not None
+
+        node_id = df_node.index.to_numpy()
+        node_type = df_node["node_type"].to_numpy(dtype=object)
+        types, type_index = np.unique(node_type.astype(str), return_inverse=True)
+        n = len(node_id)
+
+        # Position of the nodes of each link in the node table, -1 for unknown nodes
+        if df_link is None:
+            from_pos = to_pos = np.empty(0, dtype=np.intp)
+            link_type = np.empty(0, dtype=object)
+        else:
+            from_pos = df_node.index.get_indexer(
+                df_link["from_node_id"].to_numpy(dtype=np.int64)
+            )
+            to_pos = df_node.index.get_indexer(
+                df_link["to_node_id"].to_numpy(dtype=np.int64)
+            )
+            link_type = df_link["link_type"].to_numpy(dtype=object)
 
-        return node_info
+        violations = []
+        for name, amount in (
+            ("flow", flow_link_neighbor_amount),
+            ("control", control_link_neighbor_amount),
+        ):
+            # [in_min, in_max, out_min, out_max] per node type, unconstrained if unknown
+            unconstrained = [0, np.iinfo(np.int64).max] * 2
+            limits = np.array(
+                [amount.get(t, unconstrained) for t in types], dtype=np.int64
+            ).reshape(-1, 4)
+            is_type = link_type == name
+            for direction, positions, column in (
+                ("in", to_pos, 0),
+                ("out", from_pos, 2),
+            ):
+                valid = positions[is_type & (positions >= 0)]
+                count = np.bincount(valid, minlength=n)
+                minimum = limits[type_index, column]
+                maximum = limits[type_index, column + 1]
+                invalid = (count < minimum) | (count > maximum)
+                violations.append(
+                    pd.DataFrame(
+                        {
+                            "node_id": node_id[invalid],
+                            "node_type": node_type[invalid],
+                            "link_type": name,
+                            "direction": direction,
+                            "count": count[invalid],
+                            "minimum": minimum[invalid],
+                            "maximum": maximum[invalid],
+                        }
+                    )
+                )
+        return _concat(violations, ignore_index=True)
 
     @classmethod
     def _load(cls, filepath: Path | None) -> dict[str, Any]:
-        context_file_loading.set({})
+        lazy = context_file_loading.get().get("lazy", False)
+        cache = context_file_loading.get().get("cache")
+        # Keep the cache, since `model_post_init` loads the model again on assignment
+        context_file_loading.set({} if cache is None else {"cache": cache})
 
         if filepath is not None and filepath.is_file():
             with open(filepath, "rb") as f:
@@ -448,11 +891,38 @@ class Model(FileModel):
                 raise FileNotFoundError(f"Database file '{db_path}' does not exist.")
 
             context_file_loading.get()["database"] = db_path
+            if cache is not None and not lazy:
+                key = cache._key(db_path)
+                entry = cache._get(key)
+                if entry is None:
+                    # Added once all tables are read, see `_add_to_cache`
+                    context_file_loading.get()["cache_key"] = key
+                else:
+                    context_file_loading.get()["cache_entry"] = entry
+            schema_version = _get_db_schema_version(db_path)
+            context_file_loading.get()["schema_version"] = schema_version
+            if schema_version == ribasim.__schema_version__:
+                # Outdated tables need to be migrated, so are not loaded lazily,
+                # and are not left as is on writing.
+                context_file_loading.get()["up_to_date"] = True
+                if lazy:
+                    context_file_loading.get()["lazy"] = True
+                    context_file_loading.get()["tables"] = _get_table_names(db_path)
 
             return config
         else:
             return {}
 
+    @model_validator(mode="after")
+    def _add_to_cache(self) -> "Model":
+        context = context_file_loading.get()
+        if "cache_key" in context:
+            tables = [table for node in self._nodes() for table in node._tables()]
+            context["cache"]._put(
+                context["cache_key"], [self.link, self.node_table(), *tables]
+            )
+        return self
+
     @model_validator(mode="after")
     def _reset_contextvar(self) -> "Model":
         # Drop database info
@@ -0,0 +1,60 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+__all__ = ("ValidationReport",)
+
+
+@dataclass
+class ValidationReport:
+    """The problems found by `Model.validation_report`.
+
+    Attributes
+    ----------
+    df : pd.DataFrame
+        One row per problem. Columns are ``node_id``, the node the problem is about
+        if any, ``table``, the table in which it was found, ``rule``, a short name
+        of the violated rule, and ``message``, a human readable description.
+        An empty table means the model is valid.
+    """
+
+    df: pd.DataFrame
+
+    @property
+    def is_valid(self) -> bool:
+        return self.df.empty
+
+    @classmethod
+    def _from_arrays(
+        cls,
+        table: str,
+        rule: str,
+        message: Iterable[str],
+        node_id: Iterable[int | None] | None = None,
+    ) -> "ValidationReport":
+        message = np.asarray(message, dtype=object)
+        n = len(message)
+        node_ids = (
+            pd.array([pd.NA] * n, dtype="Int32")
+            if node_id is None
+            else pd.Series(node_id).astype("Int32").array
+        )
+        return cls(
+            pd.DataFrame(
+                {
+                    "node_id": node_ids,
+                    "table": np.full(n, table, dtype=object),
+                    "rule": np.full(n, rule, dtype=object),
+                    "message": message,
+                }
+            )
+        )
+
+    @classmethod
+    def _concat(cls, reports: Iterable["ValidationReport"]) -> "ValidationReport":
+        frames = [report.df for report in reports if not report.is_valid]
+        if not frames:
+            return cls._from_arrays("", "", [])
+        return cls(pd.concat(frames, ignore_index=True))
@@ -1,8 +1,9 @@
 import logging
-from contextlib import closing
+from collections.abc import Iterable
 from datetime import datetime
+from functools import cache
 from pathlib import Path
-from sqlite3 import connect
+from sqlite3 import Connection
 
 STYLES_DIR = Path(__file__).parent / "styles"
 
@@ -86,41 +87,39 @@ SQL_STYLES_EXIST = """
 SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE type="table" AND name="layer_styles");
 """
 
-SQL_STYLES_STYLE_EXISTS = """
-SELECT EXISTS(SELECT 1 FROM layer_styles WHERE styleName = :style_name);
+SQL_STYLE_NAMES = """
+SELECT styleName FROM layer_styles;
 """
 
 
-def _no_existing_style(conn, style_name):
-    style_exists = conn.execute(
-        SQL_STYLES_STYLE_EXISTS, {"style_name": style_name}
-    ).fetchone()[0]
-    return not style_exists
+@cache
+def _load_styles() -> dict[str, bytes]:
+    """Read the QML files of all layer styles once, by style name."""
+    return {path.stem: path.read_bytes() for path in STYLES_DIR.glob("*.qml")}
 
 
-def _add_styles_to_geopackage(gpkg_path: Path, layer: str):
-    with closing(connect(gpkg_path)) as connection:
-        if not connection.execute(SQL_STYLES_EXIST).fetchone()[0]:
-            connection.execute(CREATE_TABLE_SQL)
-            connection.execute(INSERT_CONTENTS_SQL)
+def _add_styles_to_geopackage(connection: Connection, layers: Iterable[str]) -> None:
+    """Add the styles of the layers that have none yet, without committing."""
+    if not connection.execute(SQL_STYLES_EXIST).fetchone()[0]:
+        connection.execute(CREATE_TABLE_SQL)
+        connection.execute(INSERT_CONTENTS_SQL)
 
+    styles = _load_styles()
+    existing = {name for (name,) in connection.execute(SQL_STYLE_NAMES)}
+    update_date_time = f"{datetime.now().isoformat()}Z"
+    rows = []
+    for layer in layers:
         style_name = f"{layer.replace(' / ', '_')}Style"
-        style_qml = STYLES_DIR / f"{style_name}.qml"
-
-        if style_qml.exists() and _no_existing_style(connection, style_name):
-            description = f"Ribasim style for layer: {layer}"
-            update_date_time = f"{datetime.now().isoformat()}Z"
-
-            connection.execute(
-                INSERT_ROW_SQL,
+        if style_name not in styles:
+            logging.warning(f"Style not found for layer: {layer}")
+        elif style_name not in existing:
+            rows.append(
                 {
                     "layer": layer,
-                    "style_qml": style_qml.read_bytes(),
+                    "style_qml": styles[style_name],
                     "style_name": style_name,
-                    "description": description,
+                    "description": f"Ribasim style for layer: {layer}",
                     "update_date_time": update_date_time,
-                },
+                }
             )
-            connection.commit()
-        else:
-            logging.warning(f"Style not found for layer: {layer}")
+    connection.executemany(INSERT_ROW_SQL, rows)
@@ -1,6 +1,9 @@
 import re
+from collections.abc import Iterable
+from hashlib import blake2b
 from warnings import catch_warnings, filterwarnings
 
+import geopandas as gpd
 import numpy as np
 import pandas as pd
 from pandera.dtypes import Int32
@@ -86,6 +89,16 @@ def _concat(dfs, **kwargs):
         return pd.concat(dfs, **kwargs)
 
 
+def _fingerprint(df: pd.DataFrame) -> bytes:
+    """Hash the contents of a DataFrame, including the index, column names and dtypes."""
+    if isinstance(df, gpd.GeoDataFrame):
+        df = df.to_wkb()
+    hasher = blake2b(digest_size=16)
+    hasher.update(repr(list(df.dtypes.items())).encode())
+    hasher.update(pd.util.hash_pandas_object(df).to_numpy().tobytes())
+    return hasher.digest()
+
+
 class UsedIDs(BaseModel):
     """A helper class to manage globally unique node IDs.
 
@@ -101,8 +114,17 @@ class UsedIDs(BaseModel):
         self.node_ids.add(node_id)
         self.max_node_id = max(self.max_node_id, node_id)
 
+    def update(self, node_ids: Iterable[int]) -> None:
+        new_node_ids = set(node_ids)
+        self.node_ids.update(new_node_ids)
+        self.max_node_id = max(self.max_node_id, max(new_node_ids, default=0))
+
     def __contains__(self, value: int) -> bool:
         return self.node_ids.__contains__(value)
 
     def new_id(self) -> int:
         return self.max_node_id + 1
+
+    def new_ids(self, n: int) -> range:
+        """Return a block of `n` new IDs, following the maximum ID in use."""
+        return range(self.max_node_id + 1, self.max_node_id + 1 + n)
@@ -0,0 +1,26 @@
+import pandas as pd
+import ribasim
+from ribasim.batch import main
+from ribasim.db_utils import _get_db_schema_version, _set_db_schema_version
+
+
+def test_batch(basic, tmp_path):
+    basic.write(tmp_path / "basic/ribasim.toml")
+    basic.write(tmp_path / "nested/basic/ribasim.toml")
+    db_path = tmp_path / "basic/database.gpkg"
+    _set_db_schema_version(db_path, 3)
+    (tmp_path / "other.toml").write_text("name = 'not a model'")
+    summary_path = tmp_path / "summary.csv"
+
+    assert main(["migrate", str(tmp_path), "--processes", "2"]) == 0
+    assert _get_db_schema_version(db_path) == ribasim.__schema_version__
+
+    (tmp_path / "nested/basic/database.gpkg").write_bytes(b"corrupt" * 100)
+    assert main(["validate", str(tmp_path), "--summary", str(summary_path)]) == 1
+    summary = pd.read_csv(summary_path)
+    assert list(summary["model"]) == [
+        str(tmp_path / "basic/ribasim.toml"),
+        str(tmp_path / "nested/basic/ribasim.toml"),
+    ]
+    assert list(summary["status"]) == ["ok", "failed"]
+    assert (summary["seconds"] > 0).all()
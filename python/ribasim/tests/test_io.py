@@ -1,17 +1,27 @@
+import re
+import sqlite3
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
+import geopandas as gpd
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
 import pytest
 import ribasim
 import tomli
 from pandas import DataFrame
 from pandas.testing import assert_frame_equal
 from pydantic import ValidationError
-from ribasim import Model, Node, Solver
+from ribasim import Model, Node, ReadCache, Solver
+from ribasim.db_utils import _read_query, _read_table
+from ribasim.geometry.node import NodeTable
+from ribasim.input_base import TableModel
 from ribasim.nodes import basin, flow_boundary, flow_demand, pump, user_demand
-from ribasim.utils import UsedIDs
+from ribasim.utils import UsedIDs, _fingerprint
 from shapely.geometry import Point
 
 
@@ -47,6 +57,154 @@ def test_basic(basic, tmp_path):
     assert model_loaded.basin.time.df is None
 
 
+def test_read_node_table_once(basic, tmp_path):
+    toml_path = tmp_path / "basic/ribasim.toml"
+    basic.write(toml_path)
+
+    with patch.object(NodeTable, "_from_db", wraps=NodeTable._from_db) as from_db:
+        model = Model.read(toml_path)
+    assert from_db.call_count == 1
+
+    __assert_equal(basic.node_table().df, model.node_table().df)
+    assert (model.basin.node.df["node_type"] == "Basin").all()
+    assert model.continuous_control.node.df is None
+    assert model._used_node_ids.max_node_id == 17
+
+
+def test_read_lazy(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    basic_transient.write(toml_path)
+
+    with patch("ribasim.input_base._read_table", wraps=_read_table) as from_db:
+        model = Model.read(toml_path, lazy=True)
+        assert from_db.call_count == 0
+
+        # Untouched tables are copied as is
+        model.write(tmp_path / "copy/ribasim.toml")
+        assert from_db.call_count == 0
+
+        # Tables are read on first access
+        __assert_equal(basic_transient.basin.state.df, model.basin.state.df)
+        assert from_db.call_count == 1
+        model.basin.state.df
+        assert from_db.call_count == 1
+
+    assert model.basin.subgrid_time.df is None
+    assert "time" in repr(model.basin)
+    model_copy = Model.read(tmp_path / "copy/ribasim.toml")
+    __assert_equal(basic_transient.basin.time.df, model_copy.basin.time.df)
+    __assert_equal(basic_transient.basin.time.df, model.basin.time.df)
+
+
+def test_lazy_assign(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    basic_transient.write(toml_path)
+    model = Model.read(toml_path, lazy=True)
+
+    # Assigning replaces the table that is not read yet
+    static = basic_transient.pump.static.df.copy()
+    static["flow_rate"] = 42.0
+    model.pump.static.df = static
+    model.basin.time.df = None
+    # A table read from the database is written to the Arrow file
+    model.basin.profile.set_filepath(Path("profile.arrow"))
+    model.write(tmp_path / "copy/ribasim.toml")
+
+    model_copy = Model.read(tmp_path / "copy/ribasim.toml")
+    assert (model_copy.pump.static.df["flow_rate"] == 42.0).all()
+    assert model_copy.basin.time.df is None
+    profile = feather.read_table(tmp_path / "copy/profile.arrow")
+    assert profile.num_rows == len(basic_transient.basin.profile.df)
+
+
+def test_read_cache(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    basic_transient.write(toml_path)
+    cache = ReadCache(tmp_path / "cache")
+
+    model = Model.read(toml_path, cache=cache)
+    with (
+        patch("ribasim.input_base._read_table") as from_db,
+        # Called by the validation of the table
+        patch.object(basin.Time, "columns") as validate,
+    ):
+        model_cached = Model.read(toml_path, cache=cache)
+    assert from_db.call_count == 0
+    assert validate.call_count == 0
+
+    assert_frame_equal(model.node_table().df, model_cached.node_table().df)
+    assert_frame_equal(model.link.df, model_cached.link.df)
+    assert_frame_equal(model.basin.time.df, model_cached.basin.time.df)
+    assert model_cached.basin.subgrid_time.df is None
+
+    # A changed database is read again
+    model_cached.basin.time.df = model_cached.basin.time.df.iloc[:10]
+    model_cached.write(toml_path)
+    assert len(Model.read(toml_path, cache=cache).basin.time.df) == 10
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    # The least recently used entries are evicted
+    ReadCache(tmp_path / "cache", max_size=0)._evict()
+    assert not any((tmp_path / "cache").iterdir())
+
+
+def test_read_cache_arrow(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    basic_transient.basin.time.set_filepath(Path("time.arrow"))
+    basic_transient.write(toml_path)
+    cache = ReadCache(tmp_path / "cache")
+    Model.read(toml_path, cache=cache)
+
+    # The Arrow file is not part of the cache, so is validated on every read
+    arrow_path = tmp_path / "basic_transient/time.arrow"
+    data = feather.read_table(arrow_path)
+    feather.write_feather(data.append_column("foo", data["node_id"]), arrow_path)
+    with pytest.raises(ValidationError, match="Unrecognized column 'foo'"):
+        Model.read(toml_path, cache=cache)
+
+
+def test_scan(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    basic_transient.basin.profile.set_filepath(Path("profile.arrow"))
+    basic_transient.write(toml_path)
+    model = Model.read(toml_path, lazy=True)
+
+    selection = {
+        "node_ids": [1, 3],
+        "time_range": ("2020-01-02", datetime(2020, 1, 5)),
+        "columns": ["node_id", "time", "precipitation"],
+    }
+    expected = basic_transient.basin.time.scan(**selection)
+    assert set(expected["node_id"]) == {1, 3}
+    assert expected["time"].min() == pd.Timestamp("2020-01-02")
+    assert expected["time"].max() == pd.Timestamp("2020-01-04")
+    assert_frame_equal(
+        model.basin.time.scan(**selection), expected, check_index_type=False
+    )
+    assert_frame_equal(
+        model.basin.profile.scan(node_ids=[3], columns=["level"]),
+        basic_transient.basin.profile.scan(node_ids=[3], columns=["level"]),
+        check_index_type=False,
+    )
+    # Nothing was loaded
+    assert model.basin.time._lazy_source is not None
+    assert model.basin.profile._lazy_source is not None
+
+    # Other applications may store timestamps with a "T" separator
+    with closing(sqlite3.connect(model.basin.time._lazy_source)) as connection:
+        connection.execute("UPDATE \"Basin / time\" SET time = replace(time, ' ', 'T')")
+        connection.commit()
+    selection["time_range"] = ("2020-01-02", datetime(2020, 1, 4, 12))
+    assert_frame_equal(
+        model.basin.time.scan(**selection), expected, check_index_type=False
+    )
+
+    with pytest.raises(ValueError, match="it has no time column"):
+        model.basin.profile.scan(time_range=("2020-01-01", "2021-01-01"))
+    with pytest.raises(ValueError, match=re.escape("has no columns ['foo']")):
+        model.basin.time.scan(columns=["foo"])
+
+
 def test_basic_arrow(basic_arrow, tmp_path):
     model_orig = basic_arrow
     model_orig.write(tmp_path / "basic_arrow/ribasim.toml")
@@ -54,6 +212,70 @@ def test_basic_arrow(basic_arrow, tmp_path):
 
     __assert_equal(model_orig.basin.profile.df, model_loaded.basin.profile.df)
 
+    # Arrow tables can also be read lazily, and are copied as is
+    model_lazy = Model.read(tmp_path / "basic_arrow/ribasim.toml", lazy=True)
+    model_lazy.write(tmp_path / "basic_arrow_copy/ribasim.toml")
+    model_copy = Model.read(tmp_path / "basic_arrow_copy/ribasim.toml")
+    __assert_equal(model_orig.basin.profile.df, model_copy.basin.profile.df)
+    __assert_equal(model_orig.basin.profile.df, model_lazy.basin.profile.df)
+
+
+def test_write_arrow_format(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    with pytest.raises(ValueError, match="Unknown format 'parquet'"):
+        basic_transient.write(toml_path, format="parquet")
+
+    basic_transient.write(toml_path, format="arrow")
+    assert basic_transient.basin.time.filepath is None
+    assert toml_path.with_name("basin_time.arrow").is_file()
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        tables = {
+            name
+            for (name,) in connection.execute("SELECT table_name FROM gpkg_contents")
+        }
+    assert tables == {"Node", "Link", "ribasim_metadata", "layer_styles"}
+
+    model = Model.read(toml_path)
+    assert model.basin.time.filepath == Path("basin_time.arrow")
+    __assert_equal(basic_transient.basin.time.df, model.basin.time.df)
+    __assert_equal(basic_transient.pump.static.df, model.pump.static.df)
+
+    # A later write uses the GeoPackage again
+    basic_transient.write(tmp_path / "geopackage/ribasim.toml")
+    assert not any((tmp_path / "geopackage").glob("*.arrow"))
+
+
+def test_arrow_compression(basic_transient, tmp_path):
+    table = basic_transient.basin.time
+    table.set_filepath(Path("time.arrow"))
+    with pytest.raises(ValidationError):
+        table.set_compression("gzip")
+
+    sizes = {}
+    for compression in ["uncompressed", "lz4", "zstd"]:
+        table.set_compression(compression)
+        basic_transient.write(tmp_path / compression / "ribasim.toml")
+        sizes[compression] = (tmp_path / compression / "time.arrow").stat().st_size
+    assert sizes["uncompressed"] > sizes["lz4"] > sizes["zstd"]
+
+    # Uncompressed files are used from the memory map
+    arrow_path = tmp_path / "uncompressed/time.arrow"
+    allocated = pa.total_allocated_bytes()
+    df = basin.Time._from_arrow(arrow_path)
+    assert pa.total_allocated_bytes() == allocated
+
+    # Overwriting the memory-mapped file leaves the data intact
+    model = Model.read(tmp_path / "uncompressed/ribasim.toml")
+    model.write(tmp_path / "uncompressed/ribasim.toml")
+    __assert_equal(table.df, df)
+
+    # Reading keeps the compression of the file
+    for lazy in [False, True]:
+        model = Model.read(tmp_path / "uncompressed/ribasim.toml", lazy=lazy)
+        model.write(tmp_path / "rewritten/ribasim.toml")
+        size = (tmp_path / "rewritten/time.arrow").stat().st_size
+        assert size == sizes["uncompressed"]
+
 
 def test_basic_transient(basic_transient, tmp_path):
     model_orig = basic_transient
@@ -69,6 +291,155 @@ def test_basic_transient(basic_transient, tmp_path):
     assert time.df.shape == (1468, 6)
 
 
+def test_write_chunks(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    model = basic_transient
+    model.basin.profile.set_filepath(Path("profile.arrow"))
+    model.write(toml_path)
+    time = model.basin.time.df
+    profile = model.basin.profile.df
+
+    chunks = (time.iloc[i : i + 100] for i in range(0, len(time), 100))
+    model.basin.time.write_chunks(toml_path.parent, chunks, batch_size=30)
+    batch = pa.Table.from_pandas(profile.iloc[:3]).combine_chunks().to_batches()[0]
+    model.basin.profile.write_chunks(toml_path.parent, [batch, profile.iloc[3:]])
+    # Read on first access
+    assert "df" not in model.basin.time.__dict__
+    assert_frame_equal(model.basin.time.df, time)
+
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        tables = {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+    assert "Basin / time_partial" not in tables
+
+    # An interrupted write leaves the table as it was
+    def interrupted():
+        yield time.iloc[:100]
+        raise KeyboardInterrupt
+
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        # Left by a process that was killed while writing
+        connection.execute('CREATE TABLE "Basin / time_partial" (foo INTEGER)')
+        connection.commit()
+    with pytest.raises(KeyboardInterrupt):
+        model.basin.time.write_chunks(toml_path.parent, interrupted(), batch_size=30)
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        tables = {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+    assert "Basin / time_partial" not in tables
+
+    model_loaded = Model.read(toml_path)
+    assert_frame_equal(model_loaded.basin.time.df, time)
+    __assert_equal(model_loaded.basin.profile.df, profile)
+
+    with pytest.raises(ValueError, match="Node in chunks: it is a spatial table"):
+        model.basin.node.write_chunks(toml_path.parent, [])
+    with pytest.raises(ValueError, match="the chunks contain no rows"):
+        model.basin.state.write_chunks(toml_path.parent, [])
+
+
+def test_write_single_connection(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    with patch("ribasim.model.connect", wraps=sqlite3.connect) as connect:
+        basic_transient.write(toml_path)
+        assert connect.call_count == 1
+
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        (time, *_), *_ = connection.execute('SELECT time FROM "Basin / time"')
+        assert time == "2020-01-01 00:00:00"
+        styles = connection.execute("SELECT f_table_name FROM layer_styles")
+        assert {name for (name,) in styles} >= {"Link", "Node"}
+
+    model = Model.read(toml_path)
+    __assert_equal(basic_transient.basin.time.df, model.basin.time.df)
+    __assert_equal(
+        basic_transient.flow_boundary.static.df, model.flow_boundary.static.df
+    )
+
+
+def test_write_indexes(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    basic_transient.write(toml_path)
+
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        indexes = {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type='index'"
+            )
+        }
+        assert "ix_Basin / time_node_id_time" in indexes
+        assert "ix_Basin / profile_node_id" in indexes
+        assert "ix_Basin / subgrid_subgrid_id" in indexes
+        tables = {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'"
+            )
+        }
+        assert {"rtree_Node_geom", "rtree_Link_geom"} <= tables
+
+    # The query of a scan uses the index for both columns
+    model = Model.read(toml_path, lazy=True)
+    with patch("ribasim.input_base._read_query", wraps=_read_query) as read_query:
+        model.basin.time.scan(node_ids=[1], time_range=("2020-01-02", "2020-01-05"))
+    _, sql, _, parameters = read_query.call_args.args
+    with closing(sqlite3.connect(toml_path.with_name("database.gpkg"))) as connection:
+        plan = connection.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    assert "USING INDEX" in str(plan)
+    assert "time>? AND time<?" in str(plan)
+
+
+def test_write_incremental(basic_transient, tmp_path):
+    toml_path = tmp_path / "basic_transient/ribasim.toml"
+    db_path = toml_path.with_name("database.gpkg")
+    basic_transient.write(toml_path)
+    # Reading does not hash the tables
+    with patch(
+        "ribasim.input_base._fingerprint", side_effect=_fingerprint
+    ) as fingerprint:
+        model = Model.read(toml_path)
+        assert fingerprint.call_count == 0
+
+    write_table = patch.object(
+        TableModel,
+        "_write_geopackage",
+        autospec=True,
+        side_effect=TableModel._write_geopackage,
+    )
+    with write_table as write:
+        model.write(toml_path)
+        assert write.call_count == 0
+
+        # Changes in place are detected as well
+        model.basin.time.df.loc[0, "precipitation"] = 1.0
+        model.basin.concentration.df = None
+        model.write(toml_path)
+        assert write.call_count == 1
+
+    with closing(sqlite3.connect(db_path)) as connection:
+        tables = {
+            name
+            for (name,) in connection.execute("SELECT table_name FROM gpkg_contents")
+        }
+    assert "Basin / concentration" not in tables
+
+    model_loaded = Model.read(toml_path)
+    assert model_loaded.basin.time.df.loc[0, "precipitation"] == 1.0
+    assert model_loaded.basin.concentration.df is None
+    __assert_equal(model.basin.time.df, model_loaded.basin.time.df)
+    __assert_equal(basic_transient.basin.profile.df, model_loaded.basin.profile.df)
+    assert_frame_equal(model.node_table().df, model_loaded.node_table().df)
+
+
 @pytest.mark.xfail(reason="Needs implementation")
 def test_pydantic():
     pass
@@ -209,6 +580,95 @@ def test_node_autoincrement():
     assert nbasin.node_id == 101
 
 
+def test_add_many():
+    model = Model(
+        starttime="2020-01-01",
+        endtime="2021-01-01",
+        crs="EPSG:28992",
+    )
+    model.basin.add(Node(20, Point(0, 0)), [basin.State(level=[1.0])])
+
+    # Without node_id index, new node IDs are generated
+    nodes = gpd.GeoDataFrame(
+        data={"name": ["a", "b", "c"], "meta_id": [1, 2, 3]},
+        geometry=[Point(1, 0), Point(2, 0, 5.0), Point(3, 0)],
+        crs="EPSG:28992",
+    )
+    added = model.basin.add_many(
+        nodes,
+        [
+            basin.State(node_id=[2, 0, 1], level=[3.0, 1.0, 2.0]),
+            basin.Profile(node_id=[0, 0], area=1000.0, level=[0.0, 1.0]),
+        ],
+    )
+    assert [n.node_id for n in added] == [21, 22, 23]
+    assert added[1].node_type == "Basin"
+    assert not added[1].geometry.has_z
+    df = model.basin.node.df
+    assert df.index.to_list() == [20, 21, 22, 23]
+    assert df["name"].to_list() == ["", "a", "b", "c"]
+    assert df["meta_id"].iloc[-1] == 3
+    assert model.basin.state.df["node_id"].to_list() == [20, 23, 21, 22]
+    assert model.basin.profile.df["node_id"].to_list() == [21, 21]
+    assert model._used_node_ids.max_node_id == 23
+
+    # With a node_id index, the node IDs are used as given
+    nodes = gpd.GeoDataFrame(
+        index=pd.Index([30, 40], name="node_id"),
+        geometry=[Point(4, 0), Point(5, 0)],
+    )
+    added = model.pump.add_many(
+        nodes, [pump.Static(node_id=[30, 40], flow_rate=[1.0, 2.0])]
+    )
+    assert model.pump[40] == added[1]
+    assert model._used_node_ids.max_node_id == 40
+
+    with pytest.raises(
+        ValueError,
+        match=re.escape("Node IDs have to be unique, but [30, 40] already exist."),
+    ):
+        model.pump.add_many(nodes)
+
+    nodes = gpd.GeoDataFrame(geometry=[Point(6, 0)])
+    assert model.pump.add_many(nodes.iloc[0:0]) == []
+    with pytest.raises(
+        ValueError,
+        match=re.escape("Pump / static refers to nodes that are not added: [1]"),
+    ):
+        model.pump.add_many(nodes, [pump.Static(node_id=[1], flow_rate=[1.0])])
+
+    # An invalid later table leaves the model unchanged
+    nodes = gpd.GeoDataFrame(geometry=[Point(7, 0), Point(8, 0)])
+    state = model.basin.state.df.copy()
+    node = model.basin.node.df.copy()
+    with pytest.raises(
+        ValueError,
+        match=re.escape("Basin / profile refers to nodes that are not added: [5]"),
+    ):
+        model.basin.add_many(
+            nodes,
+            [
+                basin.State(node_id=[0, 1], level=[1.0, 2.0]),
+                basin.Profile(node_id=[5, 5], area=1000.0, level=[0.0, 1.0]),
+            ],
+        )
+    static = basin.Static(node_id=[0], precipitation=[1.0])
+    static.df["precipitation"] = ["a"]
+    with pytest.raises(ValidationError):
+        model.basin.add_many(
+            nodes,
+            [
+                basin.State(node_id=[0, 1], level=[1.0, 2.0]),
+                basin.Profile(node_id=[0, 1], area=1000.0, level=[0.0, 1.0]),
+                static,
+            ],
+        )
+    pd.testing.assert_frame_equal(model.basin.state.df, state)
+    pd.testing.assert_frame_equal(model.basin.node.df, node)
+    assert model.basin.profile.df["node_id"].to_list() == [21, 21]
+    assert model._used_node_ids.max_node_id == 40
+
+
 def test_node_autoincrement_existing_model(basic, tmp_path):
     model = basic
 
@@ -341,6 +801,29 @@ def test_closed_model(basic, tmp_path):
     model.write(toml_path)
 
 
+def test_arrow_table(tmp_path):
+    data = pa.table(
+        {
+            "node_id": pa.array([1, 1], pa.int64()),
+            "time": ["2020-01-01 00:00:00", "2020-01-02 00:00:00.5"],
+            "precipitation": [1.0, 2.0],
+        }
+    )
+    table = basin.Time(df=data)
+    assert table.df["node_id"].dtype == "int32[pyarrow]"
+    assert table.df["time"].dtype == "timestamp[ms][pyarrow]"
+    assert table.df["time"].iloc[1] == pd.Timestamp("2020-01-02 00:00:00.5")
+
+    # The Arrow table shares the memory of the DataFrame
+    arrow = table.to_arrow()
+    (buffer,) = arrow["precipitation"].chunks[0].buffers()[1:]
+    (df_buffer,) = pa.array(table.df["precipitation"]).buffers()[1:]
+    assert buffer.address == df_buffer.address
+
+    table.df = arrow
+    assert_frame_equal(table.df, basin.Time(df=data).df)
+
+
 def test_arrow_dtype():
     # Below millisecond precision is not supported
     with pytest.raises(ValidationError):
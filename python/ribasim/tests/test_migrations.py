@@ -1,8 +1,20 @@
+import shutil
+import warnings
+from contextlib import closing
 from pathlib import Path
+from sqlite3 import connect
 
 import pytest
-from ribasim import Model
-from ribasim.db_utils import _get_db_schema_version
+import ribasim
+from pandas.testing import assert_frame_equal
+from ribasim import Model, migrate
+from ribasim.db_utils import (
+    _get_db_schema_version,
+    _register_gpkg_functions,
+    _rename_db_column,
+    _rename_table,
+    _set_db_schema_version,
+)
 
 root_folder = Path(__file__).parent.parent.parent.parent
 print(root_folder)
@@ -23,3 +35,59 @@ def test_hws_migration(tmp_path):
     assert model.link.df.index.name == "link_id"
     assert len(model.link.df) == 454
     model.write(tmp_path / "hws_migrated.toml")
+
+
+def test_migrate(basic, tmp_path):
+    toml_path = tmp_path / "basic/ribasim.toml"
+    db_path = toml_path.with_name("database.gpkg")
+    basic.write(toml_path)
+    expected = Model.read(toml_path)
+
+    # Turn the database into one of schema version 0
+    with closing(connect(db_path)) as connection:
+        _register_gpkg_functions(connection)
+        _rename_table(connection, "Link", "Edge")
+        _rename_db_column(connection, "Edge", "link_id", "edge_id")
+        _rename_db_column(connection, "Edge", "link_type", "edge_type")
+        connection.execute('ALTER TABLE "Edge" ADD COLUMN "from_node_type" TEXT')
+        _rename_db_column(connection, "Node", "node_id", "fid")
+        connection.execute('ALTER TABLE "Node" ADD COLUMN "node_id" INTEGER')
+        connection.execute('UPDATE "Node" SET "node_id" = "fid", "fid" = "fid" + 100')
+        connection.execute(
+            'ALTER TABLE "Basin / static" ADD COLUMN "urban_runoff" REAL'
+        )
+        connection.commit()
+    _set_db_schema_version(db_path, 0)
+    shutil.copytree(toml_path.parent, tmp_path / "old")
+
+    migrate(toml_path)
+    assert _get_db_schema_version(db_path) == ribasim.__schema_version__
+    with warnings.catch_warnings(record=True) as record:
+        warnings.simplefilter("always")
+        model = Model.read(toml_path)
+    assert not [w for w in record if "Migrating" in str(w.message)]
+    with pytest.warns(UserWarning, match="Migrating outdated"):
+        model_old = Model.read(tmp_path / "old/ribasim.toml")
+
+    for m in [model, model_old]:
+        assert_frame_equal(m.node_table().df, expected.node_table().df)
+        assert_frame_equal(m.link.df, expected.link.df)
+        assert_frame_equal(m.basin.static.df, expected.basin.static.df)
+
+    # Up to date models are left as is
+    mtime = db_path.stat().st_mtime_ns
+    migrate(toml_path)
+    assert db_path.stat().st_mtime_ns == mtime
+
+
+def test_migrate_arrow(basic, tmp_path):
+    toml_path = tmp_path / "basic/ribasim.toml"
+    db_path = toml_path.with_name("database.gpkg")
+    basic.basin.profile.set_filepath(Path("basin_profile.arrow"))
+    basic.write(toml_path)
+    _set_db_schema_version(db_path, 3)
+
+    # The Arrow files would not be migrated
+    with pytest.raises(ValueError, match=r"\['Basin / profile'\] are stored in Arrow"):
+        migrate(toml_path)
+    assert _get_db_schema_version(db_path) == 3
@@ -1,18 +1,21 @@
 import re
 from sqlite3 import connect
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
 import pytest
 import tomli_w
 import xugrid
+from pandera.api.pandas.container import DataFrameSchema
 from pydantic import ValidationError
 from pyproj import CRS
 from ribasim import Node
 from ribasim.config import Solver
+from ribasim.db_utils import esc_id
 from ribasim.geometry.link import NodeData
-from ribasim.input_base import esc_id
 from ribasim.model import Model
+from ribasim.nodes import pump
 from ribasim_testmodels import (
     basic_model,
     outlet_model,
@@ -65,6 +68,53 @@ def test_parent_relationship(basic):
     assert model.pump._parent_field == "pump"
 
 
+def test_batch_edit(basic):
+    model = basic
+    with model.batch_edit():
+        model.basin.static.df = pd.DataFrame({"node_id": [1, 3], "drainage": [1, 2]})
+        # Validation is deferred
+        assert model.basin.static.df["drainage"].dtype == np.int64
+        with model.batch_edit():
+            model.pump.static.df = model.pump.static.df.iloc[:1]
+        assert model.pump.static.df.index.name == "fid"
+    assert model.basin.static.df["drainage"].dtype == "double[pyarrow]"
+    assert model.basin.static.df.index.name == "fid"
+    assert len(model.pump.static.df) == 1
+
+    with pytest.raises(ValueError, match="Validation failed for 2 table\\(s\\)") as e:
+        with model.batch_edit():
+            model.basin.static.df = pd.DataFrame({"node_id": [1], "foo": [1]})
+            model.pump.static.df = pd.DataFrame({"node_id": ["a"], "flow_rate": [1]})
+            model.linear_resistance.static.df = model.linear_resistance.static.df
+    assert "Basin / static: " in str(e.value)
+    assert "Pump / static: " in str(e.value)
+    assert "LinearResistance / static" not in str(e.value)
+
+
+def test_skip_revalidation(basic):
+    table = basic.basin.profile
+    with patch.object(
+        DataFrameSchema, "validate", autospec=True, side_effect=DataFrameSchema.validate
+    ) as validate:
+        table.df = table.df
+        table.df = table.df.iloc[::-1]
+        assert validate.call_count == 1
+        # Sorting a validated table keeps it valid
+        table.sort()
+        assert validate.call_count == 1
+        assert table.df.index.dtype == np.int32
+        assert table.df.index.name == "fid"
+
+        table.df.loc[0, "area"] = None
+        with pytest.raises(ValidationError):
+            table.sort()
+        table.df.loc[0, "area"] = 1.0
+        table.df = table.df
+        table.df["foo"] = 1.0
+        with pytest.raises(ValidationError, match="Unrecognized column 'foo'"):
+            table.df = table.df
+
+
 def test_exclude_unset(basic):
     model = basic
     model.solver.saveat = 86400.0
@@ -146,6 +196,24 @@ def test_node_table(basic):
     assert df.crs == CRS.from_epsg(28992)
 
 
+def test_node_table_cache(basic):
+    model = basic
+    node = model.node_table()
+    assert model.node_table() is node
+
+    # Assigning to a node table invalidates the cache
+    model.basin.node.df = model.basin.node.df.iloc[:1]
+    new_node = model.node_table()
+    assert new_node is not node
+    assert len(new_node.df) == len(node.df) - 3
+
+    model.pump.add(Node(100, Point(0, 0)), [pump.Static(flow_rate=[1.0])])
+    assert 100 in model.node_table().df.index
+
+    model.to_crs("EPSG:4326")
+    assert model.node_table().df.crs == CRS.from_epsg(4326)
+
+
 def test_link_table(basic):
     model = basic
     df = model.link.df
@@ -230,6 +298,12 @@ def test_styles(tabulated_rating_curve: Model, tmp_path):
     with connect(tmp_path / "basic" / "database.gpkg") as conn:
         assert conn.execute("SELECT COUNT(*) FROM layer_styles").fetchone()[0] == 3
 
+    # Styles are added once
+    model.basin.area.df = model.basin.area.df.copy()
+    model.write(tmp_path / "basic" / "ribasim.toml")
+    with connect(tmp_path / "basic" / "database.gpkg") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM layer_styles").fetchone()[0] == 3
+
 
 def test_non_existent_files(tmp_path):
     with pytest.raises(
@@ -1,7 +1,8 @@
 import re
 
+import geopandas as gpd
 import pytest
-from ribasim import Node
+from ribasim import Node, ValidationReport
 from ribasim.config import Solver
 from ribasim.model import Model
 from ribasim.nodes import (
@@ -16,6 +17,7 @@ from shapely import MultiPolygon, Point, Polygon
 
 def test_duplicate_link(basic):
     model = basic
+    nlink = len(model.link.df)
     with pytest.raises(
         ValueError,
         match=re.escape(
@@ -27,6 +29,25 @@ def test_duplicate_link(basic):
             model.basin[1],
             name="duplicate",
         )
+    assert len(model.link.df) == nlink
+
+    # The neighbor index is rebuilt when the table is replaced
+    model.link.df = model.link.df[model.link.df["from_node_id"] != 16]
+    model.link.add(model.flow_boundary[16], model.basin[1])
+    assert len(model.link.df) == nlink
+
+    # And when the table is changed in place
+    df = model.link.df
+    df.drop(index=df.index[df["from_node_id"] == 16], inplace=True)
+    model.link.add(model.flow_boundary[16], model.basin[1])
+    assert len(model.link.df) == nlink
+
+    # And when a column is edited in place
+    df = model.link.df
+    link_id = df.index[(df["from_node_id"] == 1) & (df["to_node_id"] == 2)][0]
+    df.loc[link_id, "to_node_id"] = 7
+    model.link.add(model.basin[1], model.manning_resistance[2])
+    assert len(model.link.df) == nlink + 1
 
 
 def test_connectivity(trivial):
@@ -101,6 +122,50 @@ def test_maximum_control_neighbor(pid_control_equation):
         )
 
 
+def test_add_many_links():
+    model = Model(
+        starttime="2020-01-01",
+        endtime="2021-01-01",
+        crs="EPSG:28992",
+    )
+    basins = model.basin.add_many(
+        gpd.GeoDataFrame(geometry=[Point(0, 0), Point(2, 0), Point(4, 0)]),
+        [basin.State(node_id=[0, 1, 2], level=0.0)],
+    )
+    outlets = model.outlet.add_many(
+        gpd.GeoDataFrame(geometry=[Point(1, 0), Point(3, 0)]),
+        [outlet.Static(node_id=[0, 1], flow_rate=1e-3)],
+    )
+    model.link.add_many(basins[:2], outlets, name="upstream")
+    model.link.add_many(outlets, basins[1:], link_id=[10, 20])
+
+    df = model.link.df
+    assert df.index.to_list() == [1, 2, 10, 20]
+    assert df["from_node_id"].to_list() == [1, 2, 4, 5]
+    assert df["to_node_id"].to_list() == [4, 5, 2, 3]
+    assert (df["link_type"] == "flow").all()
+    assert df["name"].to_list() == ["upstream", "upstream", "", ""]
+    assert df.geometry.iloc[3].coords[:] == [(3.0, 0.0), (4.0, 0.0)]
+    assert model.link._used_link_ids.max_node_id == 20
+
+    with pytest.raises(
+        ValueError,
+        match=re.escape("Links have to be unique, but link with from_node_id 1"),
+    ):
+        model.link.add_many(basins[:1], outlets[:1])
+    with pytest.raises(
+        ValueError,
+        match=re.escape("Node 4 can have at most 1 flow link outneighbor(s) (got 2)"),
+    ):
+        model.link.add_many(outlets[:1], basins[2:])
+    with pytest.raises(
+        ValueError,
+        match="Node of type Basin cannot be downstream of node of type Basin.",
+    ):
+        model.link.add_many(basins[:1], basins[1:2])
+    assert len(model.link.df) == 4
+
+
 def test_minimum_flow_neighbor():
     model = Model(
         starttime="2020-01-01",
@@ -130,6 +195,90 @@ def test_minimum_flow_neighbor():
         model.write("test.toml")
 
 
+def test_neighbor_violations():
+    model = Model(
+        starttime="2020-01-01",
+        endtime="2021-01-01",
+        crs="EPSG:28992",
+        solver=Solver(),
+    )
+
+    model.basin.add(
+        Node(3, Point(2.0, 0.0)),
+        [
+            basin.Profile(area=[1000.0, 1000.0], level=[0.0, 1.0]),
+            basin.State(level=[0.0]),
+        ],
+    )
+    model.outlet.add(
+        Node(2, Point(1.0, 0.0)),
+        [outlet.Static(flow_rate=[1e-3], min_upstream_level=[2.0])],
+    )
+    model.terminal.add(Node(4, Point(3.0, -2.0)))
+    model.link.add(model.basin[3], model.outlet[2])
+
+    violations = model._neighbor_violations()
+    assert violations[["node_id", "link_type", "direction"]].values.tolist() == [
+        [4, "flow", "in"],
+        [2, "flow", "out"],
+    ]
+    assert violations["count"].tolist() == [0, 0]
+    assert violations["minimum"].tolist() == [1, 1]
+
+
+def test_validate(basic):
+    model = basic
+    assert model.validation_report().is_valid
+
+    df = model.link.df
+    df.loc[df.index[0], "to_node_id"] = 999
+    df.loc[df.index[1], ["from_node_id", "to_node_id"]] = df.loc[
+        df.index[2], ["from_node_id", "to_node_id"]
+    ]
+    model.basin.profile.df.loc[0, "area"] = None
+
+    report = model.validation_report()
+    assert isinstance(report, ValidationReport)
+    assert not report.is_valid
+    df_report = report.df
+    assert list(df_report.columns) == ["node_id", "table", "rule", "message"]
+    assert df_report["rule"].value_counts().to_dict() == {
+        "min_neighbors": 2,
+        "schema": 1,
+        "unknown_node": 1,
+        "duplicate_link": 1,
+        "max_neighbors": 1,
+    }
+    schema = df_report[df_report["rule"] == "schema"].iloc[0]
+    assert schema["table"] == "Basin / profile"
+    assert schema["node_id"] == 1
+    unknown = df_report[df_report["rule"] == "unknown_node"].iloc[0]
+    assert unknown["node_id"] == 999
+    assert unknown["message"] == (
+        f"Link {df.index[0]} has to_node_id 999, which is not in the Node table"
+    )
+
+
+def test_node_references(basic, tmp_path):
+    model = basic
+    model.pump.static.df.loc[0, "node_id"] = 1
+    model.basin.profile.df.loc[0, "node_id"] = 999
+
+    report = model.validation_report()
+    assert report.df[["node_id", "table", "rule"]].values.tolist() == [
+        [999, "Basin / profile", "unknown_node"],
+        [1, "Pump / static", "node_type"],
+    ]
+    assert report.df["message"].iloc[1] == (
+        "Pump / static has node_id 1, which is a Basin node instead of a Pump node"
+    )
+    with pytest.raises(
+        ValueError,
+        match="Tables refer to unknown nodes or nodes of another type",
+    ):
+        model.write(tmp_path / "ribasim.toml")
+
+
 def test_minimum_control_neighbor():
     model = Model(
         starttime="2020-01-01",
@@ -184,5 +333,9 @@ def test_geometry_validation():
     basinarea = basin.Area(geometry=[basinarea.df.geometry[0]])
     assert isinstance(basinarea.df.geometry[0], MultiPolygon)
 
+    basinarea = basin.Area(node_id=[1, 2], geometry=[poly, None])
+    assert isinstance(basinarea.df.geometry[0], MultiPolygon)
+    assert basinarea.df.geometry[1] is None
+
     with pytest.raises(ValueError):
         basin.Area(geometry=[point])